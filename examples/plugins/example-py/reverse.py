@@ -13,9 +13,39 @@ Signal Handling:
 
 import json
 import sys
+import re
 import os
 import signal
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# A run of 19+ digits may be an integer outside orjson's 64-bit range
+LONG_INTEGER_RE = re.compile(rb'\d{19}')
+
+
+def loads(data: bytes):
+    """Parse JSON input, using orjson when it is installed."""
+    # orjson reads integers wider than 64 bits as floats, so leave those to json
+    if orjson is not None and not LONG_INTEGER_RE.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def emit(result: dict) -> None:
+    """Write a JSON response line straight to the stdout buffer."""
+    if orjson is not None:
+        try:
+            sys.stdout.buffer.write(orjson.dumps(result, option=orjson.OPT_APPEND_NEWLINE))
+            return
+        except TypeError:
+            # orjson only handles 64-bit integers; let json encode bignums
+            pass
+    sys.stdout.buffer.write(json.dumps(result).encode('utf-8') + b'\n')
+
 
 def reverse_string(text: str, preserve_case: bool = True) -> dict:
     """
@@ -83,7 +113,7 @@ def main():
 
     try:
         # Read input from stdin
-        input_data = json.loads(sys.stdin.read())
+        input_data = loads(sys.stdin.buffer.read())
 
         # Extract parameters
         text = input_data.get('text', '')
@@ -101,7 +131,7 @@ def main():
             result = reverse_string(text, preserve_case)
 
         # Output result as JSON
-        print(json.dumps(result))
+        emit(result)
 
     except json.JSONDecodeError as e:
         # Invalid JSON input
@@ -110,7 +140,7 @@ def main():
             'error': f'Invalid JSON input: {str(e)}',
             'error_type': 'input_error'
         }
-        print(json.dumps(error_result))
+        emit(error_result)
         sys.exit(1)
 
     except Exception as e:
@@ -120,7 +150,7 @@ def main():
             'error': f'Unexpected error: {str(e)}',
             'error_type': 'system_error'
         }
-        print(json.dumps(error_result))
+        emit(error_result)
         sys.exit(1)
 
 
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+import importlib.util
+import os
+import tempfile
+import unittest
+
+TOOL_PATH = os.path.join(os.path.dirname(__file__), '..', 'tools', 'solve-ode.py')
+
+
+def load_tool():
+    """Import solve-ode.py as a module; its file name is not a valid identifier."""
+    spec = importlib.util.spec_from_file_location('solve_ode', TOOL_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class SolveOdeCseTest(unittest.TestCase):
+    def setUp(self):
+        self.tool = load_tool()
+        # Keep the disk cache from serving or storing results between tests
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.tool.CACHE_DIR = self.cache_dir.name
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_multi_branch_solution_keeps_function_on_left(self):
+        result = self.tool.solve_ode("f'(x) = x/f(x)", cse=True)
+
+        self.assertTrue(result["success"], result)
+        self.assertEqual(result["solution"], "[Eq(f(x), -x0), Eq(f(x), x0)]")
+        self.assertEqual(result["common_subexpressions"], [["x0", "sqrt(C1 + x**2)"]])
+
+    def test_single_solution_without_repeats(self):
+        result = self.tool.solve_ode("f'(x) = f(x)", cse=True)
+
+        self.assertTrue(result["success"], result)
+        self.assertEqual(result["solution"], "Eq(f(x), C1*exp(x))")
+        self.assertEqual(result["common_subexpressions"], [])
+
+    def test_without_cse_has_no_subexpressions(self):
+        result = self.tool.solve_ode("f'(x) = x/f(x)")
+
+        self.assertTrue(result["success"], result)
+        self.assertEqual(result["solution"], "[Eq(f(x), -sqrt(C1 + x**2)), Eq(f(x), sqrt(C1 + x**2))]")
+        self.assertNotIn("common_subexpressions", result)
+
+
+if __name__ == "__main__":
+    unittest.main()
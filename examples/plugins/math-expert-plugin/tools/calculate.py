@@ -1,9 +1,41 @@
 #!/usr/bin/env python3
 import json
 import sys
+import re
 import ast
 import math
 import operator
+import functools
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# A run of 19+ digits may be an integer outside orjson's 64-bit range
+LONG_INTEGER_RE = re.compile(rb'\d{19}')
+
+
+def loads(data):
+    """Parse JSON input, using orjson when it is installed."""
+    # orjson reads integers wider than 64 bits as floats, so leave those to json
+    if orjson is not None and not LONG_INTEGER_RE.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def emit(response):
+    """Write a JSON response line straight to the stdout buffer."""
+    if orjson is not None:
+        try:
+            sys.stdout.buffer.write(orjson.dumps(response, option=orjson.OPT_APPEND_NEWLINE))
+            return
+        except TypeError:
+            # orjson only handles 64-bit integers; let json encode bignums
+            pass
+    sys.stdout.buffer.write(json.dumps(response).encode('utf-8') + b"\n")
+
 
 # Define allowed operations and functions
 ALLOWED_OPS = {
@@ -41,11 +73,10 @@ class SafeEvaluator(ast.NodeVisitor):
 
     def evaluate(self, node):
         """Evaluate an AST node safely."""
-        method_name = f'eval_{type(node).__name__}'
-        method = getattr(self, method_name, None)
-        if method is None:
+        handler = self._DISPATCH.get(type(node))
+        if handler is None:
             raise ValueError(f"Unsupported operation: {type(node).__name__}")
-        return method(node)
+        return handler(self, node)
 
     def eval_Expression(self, node):
         """Evaluate an Expression node."""
@@ -57,19 +88,15 @@ class SafeEvaluator(ast.NodeVisitor):
             return node.value
         raise ValueError(f"Unsupported constant type: {type(node.value).__name__}")
 
-    def eval_Num(self, node):
-        """Evaluate a Num node (for older Python versions)."""
-        return node.n
-
     def eval_BinOp(self, node):
         """Evaluate a binary operation."""
         op_type = type(node.op)
-        if op_type not in ALLOWED_OPS:
+        op_func = ALLOWED_OPS.get(op_type)
+        if op_func is None:
             raise ValueError(f"Unsupported binary operation: {op_type.__name__}")
 
         left = self.evaluate(node.left)
         right = self.evaluate(node.right)
-        op_func = ALLOWED_OPS[op_type]
 
         # Handle division by zero
         if op_type in (ast.Div, ast.FloorDiv, ast.Mod) and right == 0:
@@ -80,12 +107,11 @@ class SafeEvaluator(ast.NodeVisitor):
     def eval_UnaryOp(self, node):
         """Evaluate a unary operation."""
         op_type = type(node.op)
-        if op_type not in ALLOWED_OPS:
+        op_func = ALLOWED_OPS.get(op_type)
+        if op_func is None:
             raise ValueError(f"Unsupported unary operation: {op_type.__name__}")
 
-        operand = self.evaluate(node.operand)
-        op_func = ALLOWED_OPS[op_type]
-        return op_func(operand)
+        return op_func(self.evaluate(node.operand))
 
     def eval_Call(self, node):
         """Evaluate a function call."""
@@ -112,10 +138,25 @@ class SafeEvaluator(ast.NodeVisitor):
             raise ValueError(f"Unsupported constant: {node.id}")
         return ALLOWED_CONSTANTS[node.id]
 
+    # Map node types straight to handlers so each visit is one dict lookup
+    # instead of building an 'eval_<Name>' string and calling getattr
+    _DISPATCH = {
+        ast.Expression: eval_Expression,
+        ast.Constant: eval_Constant,
+        ast.BinOp: eval_BinOp,
+        ast.UnaryOp: eval_UnaryOp,
+        ast.Call: eval_Call,
+        ast.Name: eval_Name,
+    }
+
+@functools.lru_cache(maxsize=256)
 def safe_evaluate(expression):
     """
     Safely evaluate a mathematical expression.
 
+    Results are memoized by expression string, so repeated evaluations of the
+    same expression skip parsing and tree walking. Failures are not cached.
+
     Args:
         expression: String containing the mathematical expression
 
@@ -144,74 +185,74 @@ def safe_evaluate(expression):
 def main():
     try:
         # Read input from stdin
-        input_data = json.load(sys.stdin)
+        input_data = loads(sys.stdin.buffer.read())
 
         expression = input_data.get('expression')
 
         if expression is None:
-            print(json.dumps({
+            emit({
                 "success": False,
                 "error": "Missing required parameter 'expression'"
-            }))
+            })
             sys.exit(1)
 
         if not isinstance(expression, str) or not expression.strip():
-            print(json.dumps({
+            emit({
                 "success": False,
                 "error": "Expression must be a non-empty string"
-            }))
+            })
             sys.exit(1)
 
         # Evaluate the expression safely
         result = safe_evaluate(expression.strip())
 
         # Return result
-        print(json.dumps({
+        emit({
             "success": True,
             "result": result,
             "expression": expression.strip()
-        }))
+        })
 
     except ZeroDivisionError:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": "Division by zero"
-        }))
+        })
         sys.exit(1)
 
     except ValueError as e:
         error_msg = str(e)
         if "Unsupported" in error_msg or "Invalid" in error_msg:
-            print(json.dumps({
+            emit({
                 "success": False,
                 "error": f"Invalid expression: only mathematical operations allowed. {error_msg}"
-            }))
+            })
         else:
-            print(json.dumps({
+            emit({
                 "success": False,
                 "error": error_msg
-            }))
+            })
         sys.exit(1)
 
     except SyntaxError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Syntax error in expression: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
     except json.JSONDecodeError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Invalid JSON input: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
     except Exception as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Unexpected error: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -1,32 +1,63 @@
 #!/usr/bin/env python3
 import json
 import sys
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# A run of 19+ digits may be an integer outside orjson's 64-bit range
+LONG_INTEGER_RE = re.compile(rb'\d{19}')
+
+
+def loads(data):
+    """Parse JSON input, using orjson when it is installed."""
+    # orjson reads integers wider than 64 bits as floats, so leave those to json
+    if orjson is not None and not LONG_INTEGER_RE.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def emit(response):
+    """Write a JSON response line straight to the stdout buffer."""
+    if orjson is not None:
+        try:
+            sys.stdout.buffer.write(orjson.dumps(response, option=orjson.OPT_APPEND_NEWLINE))
+            return
+        except TypeError:
+            # orjson only handles 64-bit integers; let json encode bignums
+            pass
+    sys.stdout.buffer.write(json.dumps(response).encode('utf-8') + b"\n")
+
 
 def main():
     try:
         # Read input from stdin
-        input_data = json.load(sys.stdin)
+        input_data = loads(sys.stdin.buffer.read())
 
         reason = input_data.get('reason', 'Operation not supported with available tools')
 
         # Return result indicating the agent cannot perform the calculation
-        print(json.dumps({
+        emit({
             "success": True,
             "result": f"I cannot perform this calculation with my available tools. {reason}",
             "cannot-calculate": True
-        }))
+        })
 
     except json.JSONDecodeError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Invalid JSON input: {str(e)}"
-        }))
+        })
         sys.exit(1)
     except Exception as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Unexpected error: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
 if __name__ == "__main__":
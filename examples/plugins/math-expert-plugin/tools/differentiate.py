@@ -2,49 +2,153 @@
 import json
 import sys
 import re
+import ast
+import string
+import functools
 
 try:
-    import sympy
+    import orjson
 except ImportError:
-    print(json.dumps({
-        "success": False,
-        "error": "SymPy is not installed. Please install it using: pip install sympy"
-    }))
-    sys.exit(1)
+    orjson = None
+
+
+# A run of 19+ digits may be an integer outside orjson's 64-bit range
+LONG_INTEGER_RE = re.compile(rb'\d{19}')
+
+
+def loads(data):
+    """Parse JSON input, using orjson when it is installed."""
+    # orjson reads integers wider than 64 bits as floats, so leave those to json
+    if orjson is not None and not LONG_INTEGER_RE.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def emit(response):
+    """Write a JSON response line straight to the stdout buffer."""
+    if orjson is not None:
+        try:
+            sys.stdout.buffer.write(orjson.dumps(response, option=orjson.OPT_APPEND_NEWLINE))
+            return
+        except TypeError:
+            # orjson only handles 64-bit integers; let json encode bignums
+            pass
+    sys.stdout.buffer.write(json.dumps(response).encode('utf-8') + b"\n")
+
+
+# SymPy is imported on first use so rejected input never pays for the import
+sympy = None
+
+
+def require_sympy():
+    """Import SymPy on first use and return the module."""
+    global sympy
+    if sympy is None:
+        try:
+            import sympy as sympy_module
+        except ImportError:
+            raise ValueError("SymPy is not installed. Please install it using: pip install sympy")
+        sympy = sympy_module
+    return sympy
+
+
+# Characters permitted in an expression: letters, numbers, underscores,
+# basic operators, parentheses, and whitespace
+ALLOWED_CHARS = frozenset(string.ascii_letters + string.digits + '_+-*/().,^%' + string.whitespace)
+
+# Syntax permitted in a parsed expression: arithmetic on numbers and names,
+# plus function calls
+ALLOWED_NODES = frozenset({
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Constant, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.BitXor,
+    ast.USub, ast.UAdd,
+})
+
+# Functions an expression may call. Single-letter names are also allowed,
+# since SymPy treats them as undefined functions (e.g. f(x)).
+ALLOWED_FUNCTIONS = frozenset({
+    'sin', 'cos', 'tan', 'cot', 'sec', 'csc',
+    'asin', 'acos', 'atan', 'acot', 'asec', 'acsc', 'atan2',
+    'sinh', 'cosh', 'tanh', 'coth', 'sech', 'csch',
+    'asinh', 'acosh', 'atanh', 'acoth',
+    'exp', 'log', 'ln', 'sqrt', 'cbrt', 'root',
+    'abs', 'Abs', 'sign', 'floor', 'ceiling', 'Min', 'Max', 're', 'im',
+    'factorial', 'gamma', 'erf', 'erfc', 'Heaviside',
+})
 
 
 def validate_expression(expr_str):
     """
     Validate that an expression string is safe for sympify.
 
-    Prevents code execution by checking for dangerous patterns before parsing.
+    Prevents code execution by parsing the expression and accepting only
+    arithmetic on numbers and names plus calls to known math functions.
 
     Args:
         expr_str: Expression string to validate
 
     Raises:
-        ValueError: If expression contains dangerous patterns
+        ValueError: If expression contains forbidden characters or syntax
     """
-    # Remove whitespace for checking
-    check_str = expr_str.replace(' ', '')
-
-    # Block common code execution patterns
-    dangerous_patterns = [
-        '__', 'import', 'exec', 'eval', 'compile', 'open', 'file',
-        'input', 'raw_input', 'globals', 'locals', 'vars', 'dir',
-        'getattr', 'setattr', 'delattr', 'hasattr', 'callable',
-        'classmethod', 'staticmethod', 'property', 'lambda'
-    ]
-
-    for pattern in dangerous_patterns:
-        if pattern in check_str.lower():
-            raise ValueError(f"Invalid expression: contains forbidden pattern '{pattern}'")
-
-    # Allow only: letters, numbers, basic operators, parentheses, and common math functions
-    allowed_pattern = r'^[a-zA-Z0-9\+\-\*/\(\)\.\,\s\^\%]+$'
-    if not re.match(allowed_pattern, expr_str):
+    if not ALLOWED_CHARS.issuperset(expr_str):
         raise ValueError("Invalid expression: contains forbidden characters")
 
+    try:
+        tree = ast.parse(expr_str.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression syntax: {e.msg}")
+
+    for node in ast.walk(tree):
+        node_type = type(node)
+        if node_type not in ALLOWED_NODES:
+            raise ValueError(f"Invalid expression: unsupported syntax '{node_type.__name__}'")
+
+        if node_type is ast.Name and '__' in node.id:
+            raise ValueError("Invalid expression: contains forbidden pattern '__'")
+
+        if node_type is ast.Constant and not isinstance(node.value, (int, float, complex)):
+            raise ValueError(f"Invalid expression: unsupported constant {node.value!r}")
+
+        if node_type is ast.Call:
+            func = node.func
+            if type(func) is not ast.Name:
+                raise ValueError("Invalid expression: only simple function calls are allowed")
+            if func.id not in ALLOWED_FUNCTIONS and len(func.id) != 1:
+                raise ValueError(f"Invalid expression: unsupported function '{func.id}'")
+
+
+@functools.lru_cache(maxsize=512)
+def compute_derivative(expression_str, variable_str, order):
+    """
+    Differentiate and simplify a validated expression, memoized by its inputs.
+
+    Args:
+        expression_str: String containing the mathematical expression
+        variable_str: String representing the variable to differentiate with respect to
+        order: Order of derivative
+
+    Returns:
+        String form of the simplified derivative
+    """
+    require_sympy()
+
+    # Parse the expression using SymPy with restricted namespace
+    safe_locals = {}
+    expr = sympy.sympify(expression_str, locals=safe_locals)
+
+    # Define the variable
+    variable = sympy.Symbol(variable_str)
+
+    # Compute the derivative
+    derivative = sympy.diff(expr, variable, order)
+
+    # Numbers and bare symbols are already in simplest form
+    if derivative.is_Atom:
+        return str(derivative)
+
+    # Simplify the result
+    return str(sympy.simplify(derivative))
+
 
 def differentiate_expression(expression_str, variable_str='x', order=1):
     """
@@ -62,22 +166,12 @@ def differentiate_expression(expression_str, variable_str='x', order=1):
         # Validate expression
         validate_expression(expression_str)
 
-        # Parse the expression using SymPy with restricted namespace
-        safe_locals = {}
-        expr = sympy.sympify(expression_str, locals=safe_locals)
-
-        # Define the variable
-        variable = sympy.Symbol(variable_str)
-
         # Compute the derivative
-        derivative = sympy.diff(expr, variable, order)
-
-        # Simplify the result
-        simplified = sympy.simplify(derivative)
+        derivative = compute_derivative(expression_str, variable_str, order)
 
         return {
             "success": True,
-            "derivative": str(simplified),
+            "derivative": derivative,
             "expression": expression_str,
             "variable": variable_str,
             "order": order
@@ -98,7 +192,7 @@ def differentiate_expression(expression_str, variable_str='x', order=1):
 def main():
     try:
         # Read input from stdin
-        input_data = json.load(sys.stdin)
+        input_data = loads(sys.stdin.buffer.read())
 
         expression = input_data.get('expression')
         variable = input_data.get('variable', 'x')
@@ -106,55 +200,55 @@ def main():
 
         # Validate inputs
         if expression is None:
-            print(json.dumps({
+            emit({
                 "success": False,
                 "error": "Missing required parameter 'expression'"
-            }))
+            })
             sys.exit(1)
 
         if not isinstance(expression, str) or not expression.strip():
-            print(json.dumps({
+            emit({
                 "success": False,
                 "error": "Expression must be a non-empty string"
-            }))
+            })
             sys.exit(1)
 
         if not isinstance(variable, str) or not variable.strip():
-            print(json.dumps({
+            emit({
                 "success": False,
                 "error": "Variable must be a non-empty string"
-            }))
+            })
             sys.exit(1)
 
         if not isinstance(order, int) or order < 1:
-            print(json.dumps({
+            emit({
                 "success": False,
                 "error": "Order must be a positive integer"
-            }))
+            })
             sys.exit(1)
 
         # Compute the derivative
         result = differentiate_expression(expression.strip(), variable.strip(), order)
 
         # Return result
-        print(json.dumps(result))
+        emit(result)
 
         # Exit with error code if computation failed
         if not result.get("success", False):
             sys.exit(1)
 
     except json.JSONDecodeError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Invalid JSON input: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
     except Exception as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Unexpected error: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
 
@@ -2,15 +2,70 @@
 import json
 import sys
 import re
+import functools
+from tokenize import TokenError
 
 try:
-    import sympy
+    import orjson
 except ImportError:
-    print(json.dumps({
-        "success": False,
-        "error": "SymPy is not installed. Please install it using: pip install sympy"
-    }))
-    sys.exit(1)
+    orjson = None
+
+# A run of 19+ digits may be an integer outside orjson's 64-bit range
+LONG_INTEGER_RE = re.compile(rb'\d{19}')
+
+
+def loads(data):
+    """Parse JSON input, using orjson when it is installed."""
+    # orjson reads integers wider than 64 bits as floats, so leave those to json
+    if orjson is not None and not LONG_INTEGER_RE.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def emit(response):
+    """Write a JSON response line straight to the stdout buffer."""
+    if orjson is not None:
+        try:
+            sys.stdout.buffer.write(orjson.dumps(response, option=orjson.OPT_APPEND_NEWLINE))
+            return
+        except TypeError:
+            # orjson only handles 64-bit integers; let json encode bignums
+            pass
+    sys.stdout.buffer.write(json.dumps(response).encode('utf-8') + b"\n")
+
+
+# SymPy and its parser are imported on first use so rejected input never pays for the import
+sympy = None
+parse_expr = None
+TRANSFORMATIONS = None
+
+
+def require_sympy():
+    """Import SymPy and its expression parser on first use and return the module."""
+    global sympy, parse_expr, TRANSFORMATIONS
+    if sympy is None:
+        try:
+            import sympy as sympy_module
+            from sympy.parsing import sympy_parser
+        except ImportError:
+            raise ValueError("SymPy is not installed. Please install it using: pip install sympy")
+        parse_expr = sympy_parser.parse_expr
+        # Same parser rules sympify() applies to strings, including '^' as power
+        TRANSFORMATIONS = sympy_parser.standard_transformations + (sympy_parser.convert_xor,)
+        sympy = sympy_module
+    return sympy
+
+
+# Common code execution patterns, blocked anywhere in an expression
+DANGEROUS_PATTERNS = [
+    '__', 'import', 'exec', 'eval', 'compile', 'open', 'file',
+    'input', 'raw_input', 'globals', 'locals', 'vars', 'dir',
+    'getattr', 'setattr', 'delattr', 'hasattr', 'callable',
+    'classmethod', 'staticmethod', 'property', 'lambda'
+]
+DANGEROUS_PATTERN_RE = re.compile('|'.join(map(re.escape, DANGEROUS_PATTERNS)))
+
+ALLOWED_EXPRESSION_RE = re.compile(r'^[a-zA-Z0-9\+\-\*/\(\)\.\,\s\^\%]+$')
 
 
 def validate_expression(expr_str):
@@ -25,27 +80,135 @@ def validate_expression(expr_str):
     Raises:
         ValueError: If expression contains dangerous patterns
     """
-    # Remove whitespace for checking
-    check_str = expr_str.replace(' ', '')
+    # Remove all whitespace and lowercase once for checking
+    check_str = ''.join(expr_str.split()).lower()
 
     # Block common code execution patterns
-    dangerous_patterns = [
-        '__', 'import', 'exec', 'eval', 'compile', 'open', 'file',
-        'input', 'raw_input', 'globals', 'locals', 'vars', 'dir',
-        'getattr', 'setattr', 'delattr', 'hasattr', 'callable',
-        'classmethod', 'staticmethod', 'property', 'lambda'
-    ]
-
-    for pattern in dangerous_patterns:
-        if pattern in check_str.lower():
-            raise ValueError(f"Invalid expression: contains forbidden pattern '{pattern}'")
+    match = DANGEROUS_PATTERN_RE.search(check_str)
+    if match:
+        raise ValueError(f"Invalid expression: contains forbidden pattern '{match.group(0)}'")
 
     # Allow only: letters, numbers, basic operators, parentheses, and common math functions
-    allowed_pattern = r'^[a-zA-Z0-9\+\-\*/\(\)\.\,\s\^\%]+$'
-    if not re.match(allowed_pattern, expr_str):
+    if not ALLOWED_EXPRESSION_RE.match(expr_str):
         raise ValueError("Invalid expression: contains forbidden characters")
 
 
+@functools.lru_cache(maxsize=512)
+def parse_expression(expr_str):
+    """Parse a validated expression string, reusing earlier parses."""
+    try:
+        return parse_expr(expr_str, local_dict={}, transformations=TRANSFORMATIONS)
+    except (SyntaxError, TokenError):
+        raise ValueError(f"Invalid expression syntax: could not parse '{expr_str}'")
+
+
+@functools.lru_cache(maxsize=64)
+def get_symbol(name):
+    """Return the SymPy symbol for a variable name, reusing earlier ones."""
+    return sympy.Symbol(name)
+
+
+def simplify_integral(integral):
+    """
+    Put an integration result into a tidy form as cheaply as possible.
+
+    cancel() normalizes rational expressions without simplify()'s heuristic
+    search; the full simplify() only runs when the integrator left an
+    unevaluated Integral behind.
+
+    Args:
+        integral: Result returned by sympy.integrate
+
+    Returns:
+        Simplified SymPy expression
+    """
+    simplified = sympy.cancel(integral)
+    if simplified.has(sympy.Integral):
+        simplified = sympy.simplify(integral)
+    return simplified
+
+
+@functools.lru_cache(maxsize=512, typed=True)
+def compute_integral(expression_str, variable_str, lower_bound=None, upper_bound=None):
+    """
+    Integrate and simplify a validated expression, reusing earlier results.
+
+    Results are memoized on the raw arguments, so a repeated query skips the
+    integrator and simplify() entirely. Bounds must already be validated.
+
+    Args:
+        expression_str: String containing the mathematical expression
+        variable_str: String representing the variable to integrate with respect to
+        lower_bound: Optional lower bound (string or number)
+        upper_bound: Optional upper bound (string or number)
+
+    Returns:
+        Tuple of (simplified integral, parsed lower bound, parsed upper bound)
+    """
+    require_sympy()
+    expr = parse_expression(expression_str)
+    variable = get_symbol(variable_str)
+
+    # Polynomials integrate term by term; skip the general integrator for them
+    antiderivative = None
+    if expr.is_polynomial(variable):
+        antiderivative = sympy.Poly(expr, variable).integrate().as_expr()
+
+    if lower_bound is None or upper_bound is None:
+        if antiderivative is not None:
+            return simplify_integral(antiderivative), None, None
+        integral = sympy.integrate(expr, variable)
+        return simplify_integral(integral), None, None
+
+    if isinstance(lower_bound, str):
+        lower = parse_expression(lower_bound)
+    else:
+        lower = lower_bound
+
+    if isinstance(upper_bound, str):
+        upper = parse_expression(upper_bound)
+    else:
+        upper = upper_bound
+
+    if antiderivative is not None and sympy.sympify(lower).is_finite and sympy.sympify(upper).is_finite:
+        definite = antiderivative.subs(variable, upper) - antiderivative.subs(variable, lower)
+        return simplify_integral(definite), lower, upper
+
+    integral = sympy.integrate(expr, (variable, lower, upper))
+    if integral.has(sympy.Integral):
+        # No closed form was found; simplifying the unevaluated Integral is wasted work
+        return integral, lower, upper
+    return simplify_integral(integral), lower, upper
+
+
+def numeric_value(result):
+    """
+    Evaluate a definite integral result to a float.
+
+    When SymPy left a single unevaluated Integral over numeric bounds, the
+    integrand is lambdified for mpmath (which ships with SymPy) and handed
+    straight to mpmath.quad, skipping the symbolic overhead of evalf().
+    Anything else, or a failed quadrature, goes through evalf().
+
+    Args:
+        result: Simplified result of a definite integration
+
+    Returns:
+        Numerical value as a float
+    """
+    if isinstance(result, sympy.Integral) and len(result.limits) == 1 and len(result.limits[0]) == 3:
+        variable, lower, upper = result.limits[0]
+        if result.function.free_symbols <= {variable} and lower.is_number and upper.is_number:
+            try:
+                import mpmath
+                func = sympy.lambdify(variable, result.function, 'mpmath')
+                return float(mpmath.quad(func, [float(lower), float(upper)]))
+            except Exception:
+                pass
+
+    return float(result.evalf())
+
+
 def integrate_expression(expression_str, variable_str='x', lower_bound=None, upper_bound=None):
     """
     Integrate a mathematical expression symbolically using SymPy.
@@ -63,38 +226,24 @@ def integrate_expression(expression_str, variable_str='x', lower_bound=None, upp
         # Validate expression
         validate_expression(expression_str)
 
-        # Parse the expression using SymPy with restricted namespace
-        safe_locals = {}
-        expr = sympy.sympify(expression_str, locals=safe_locals)
-
-        # Define the variable
-        variable = sympy.Symbol(variable_str)
-
         # Check if this is a definite or indefinite integral
         if lower_bound is not None and upper_bound is not None:
             # Definite integral
-            # Parse bounds (they can be numbers or expressions)
+            # Bounds can be numbers or expressions; anything else would reach
+            # the memoized integrator as an unhashable or meaningless key
+            for bound in (lower_bound, upper_bound):
+                if isinstance(bound, bool) or not isinstance(bound, (str, int, float)):
+                    raise ValueError("Bounds must be numbers or expression strings")
             if isinstance(lower_bound, str):
                 validate_expression(lower_bound)
-                lower = sympy.sympify(lower_bound, locals=safe_locals)
-            else:
-                lower = lower_bound
-
             if isinstance(upper_bound, str):
                 validate_expression(upper_bound)
-                upper = sympy.sympify(upper_bound, locals=safe_locals)
-            else:
-                upper = upper_bound
-
-            # Compute definite integral
-            integral = sympy.integrate(expr, (variable, lower, upper))
 
-            # Simplify the result
-            simplified = sympy.simplify(integral)
+            simplified, lower, upper = compute_integral(expression_str, variable_str, lower_bound, upper_bound)
 
             # Try to get numerical value if possible
             try:
-                numerical = float(simplified.evalf())
+                numerical = numeric_value(simplified)
                 return {
                     "success": True,
                     "integral": str(simplified),
@@ -118,10 +267,7 @@ def integrate_expression(expression_str, variable_str='x', lower_bound=None, upp
 
         else:
             # Indefinite integral
-            integral = sympy.integrate(expr, variable)
-
-            # Simplify the result
-            simplified = sympy.simplify(integral)
+            simplified, _, _ = compute_integral(expression_str, variable_str)
 
             return {
                 "success": True,
@@ -143,68 +289,111 @@ def integrate_expression(expression_str, variable_str='x', lower_bound=None, upp
         }
 
 
-def main():
-    try:
-        # Read input from stdin
-        input_data = json.load(sys.stdin)
+def handle_request(input_data):
+    """
+    Validate tool arguments and compute the requested integral.
 
-        expression = input_data.get('expression')
-        variable = input_data.get('variable', 'x')
-        lower_bound = input_data.get('lower_bound')
-        upper_bound = input_data.get('upper_bound')
+    Args:
+        input_data: Dictionary of tool arguments
 
-        # Validate inputs
-        if expression is None:
-            print(json.dumps({
-                "success": False,
-                "error": "Missing required parameter 'expression'"
-            }))
-            sys.exit(1)
+    Returns:
+        Dictionary containing success status and integral or error
+    """
+    expression = input_data.get('expression')
+    variable = input_data.get('variable', 'x')
+    lower_bound = input_data.get('lower_bound')
+    upper_bound = input_data.get('upper_bound')
 
-        if not isinstance(expression, str) or not expression.strip():
-            print(json.dumps({
-                "success": False,
-                "error": "Expression must be a non-empty string"
-            }))
-            sys.exit(1)
+    # Validate inputs
+    if expression is None:
+        return {
+            "success": False,
+            "error": "Missing required parameter 'expression'"
+        }
 
-        if not isinstance(variable, str) or not variable.strip():
-            print(json.dumps({
-                "success": False,
-                "error": "Variable must be a non-empty string"
-            }))
-            sys.exit(1)
+    if not isinstance(expression, str) or not expression.strip():
+        return {
+            "success": False,
+            "error": "Expression must be a non-empty string"
+        }
+
+    if not isinstance(variable, str) or not variable.strip():
+        return {
+            "success": False,
+            "error": "Variable must be a non-empty string"
+        }
 
-        # Check that bounds are either both provided or both missing
-        if (lower_bound is None) != (upper_bound is None):
-            print(json.dumps({
+    # Check that bounds are either both provided or both missing
+    if (lower_bound is None) != (upper_bound is None):
+        return {
+            "success": False,
+            "error": "Both lower_bound and upper_bound must be provided for definite integral, or both omitted for indefinite integral"
+        }
+
+    # Compute the integral
+    return integrate_expression(expression.strip(), variable.strip(), lower_bound, upper_bound)
+
+
+def serve():
+    """
+    Answer newline-delimited JSON requests from stdin until EOF.
+
+    Each input line is one request and each response is written as one line.
+    Keeping the process alive amortizes the SymPy import and reuses parsed
+    expressions across requests.
+    """
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+
+        try:
+            result = handle_request(loads(line))
+        except json.JSONDecodeError as e:
+            result = {
                 "success": False,
-                "error": "Both lower_bound and upper_bound must be provided for definite integral, or both omitted for indefinite integral"
-            }))
-            sys.exit(1)
+                "error": f"Invalid JSON input: {str(e)}"
+            }
+        except Exception as e:
+            result = {
+                "success": False,
+                "error": f"Unexpected error: {str(e)}"
+            }
+
+        emit(result)
+        sys.stdout.buffer.flush()
+
+
+def main():
+    if '--server' in sys.argv[1:]:
+        serve()
+        return
+
+    try:
+        # Read input from stdin
+        input_data = loads(sys.stdin.buffer.read())
 
         # Compute the integral
-        result = integrate_expression(expression.strip(), variable.strip(), lower_bound, upper_bound)
+        result = handle_request(input_data)
 
         # Return result
-        print(json.dumps(result))
+        emit(result)
 
         # Exit with error code if computation failed
         if not result.get("success", False):
             sys.exit(1)
 
     except json.JSONDecodeError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Invalid JSON input: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
     except Exception as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Unexpected error: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
 
@@ -13,22 +13,53 @@ Uses the plugin form request protocol:
 """
 import json
 import sys
+import re
 import ast
 import math
-import operator
+import functools
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# A run of 19+ digits may be an integer outside orjson's 64-bit range
+LONG_INTEGER_RE = re.compile(rb'\d{19}')
+
+
+def loads(data):
+    """Parse JSON input, using orjson when it is installed."""
+    # orjson reads integers wider than 64 bits as floats, so leave those to json
+    if orjson is not None and not LONG_INTEGER_RE.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def emit(response):
+    """Write a JSON response line straight to the stdout buffer."""
+    if orjson is not None:
+        try:
+            sys.stdout.buffer.write(orjson.dumps(response, option=orjson.OPT_APPEND_NEWLINE))
+            return
+        except TypeError:
+            # orjson only handles 64-bit integers; let json encode bignums
+            pass
+    sys.stdout.buffer.write(json.dumps(response).encode('utf-8') + b"\n")
+
 
 # Define allowed operations and functions (same as calculate.py)
-ALLOWED_OPS = {
-    ast.Add: operator.add,
-    ast.Sub: operator.sub,
-    ast.Mult: operator.mul,
-    ast.Div: operator.truediv,
-    ast.Pow: operator.pow,
-    ast.FloorDiv: operator.floordiv,
-    ast.Mod: operator.mod,
-    ast.USub: operator.neg,
-    ast.UAdd: operator.pos,
-}
+ALLOWED_OPS = frozenset({
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.Pow,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.USub,
+    ast.UAdd,
+})
 
 ALLOWED_FUNCTIONS = {
     'sqrt': math.sqrt,
@@ -49,74 +80,99 @@ ALLOWED_CONSTANTS = {
 }
 
 
-class SafeEvaluator(ast.NodeVisitor):
-    """Safe expression evaluator using AST parsing."""
+def checked_function(func_name, func):
+    """Wrap an allowed function so its failures report which call failed."""
+    def call(*args):
+        try:
+            return func(*args)
+        except Exception as e:
+            raise ValueError(f"Error calling {func_name}: {str(e)}")
+    return call
+
+
+# Globals for evaluating validated expressions; builtins are unreachable
+EVAL_NAMESPACE = {
+    '__builtins__': {},
+    **ALLOWED_CONSTANTS,
+    **{name: checked_function(name, func) for name, func in ALLOWED_FUNCTIONS.items()},
+}
 
-    def evaluate(self, node):
-        method_name = f'eval_{type(node).__name__}'
-        method = getattr(self, method_name, None)
-        if method is None:
-            raise ValueError(f"Unsupported operation: {type(node).__name__}")
-        return method(node)
 
-    def eval_Expression(self, node):
-        return self.evaluate(node.body)
+class SafeValidator:
+    """Whitelist check of an expression AST before it is compiled."""
 
-    def eval_Constant(self, node):
-        if isinstance(node.value, (int, float)):
-            return node.value
-        raise ValueError(f"Unsupported constant type: {type(node.value).__name__}")
+    def validate(self, node):
+        handler = self._DISPATCH.get(type(node))
+        if handler is None:
+            raise ValueError(f"Unsupported operation: {type(node).__name__}")
+        handler(self, node)
+
+    def check_Expression(self, node):
+        self.validate(node.body)
 
-    def eval_Num(self, node):
-        return node.n
+    def check_Constant(self, node):
+        if not isinstance(node.value, (int, float)):
+            raise ValueError(f"Unsupported constant type: {type(node.value).__name__}")
 
-    def eval_BinOp(self, node):
+    def check_BinOp(self, node):
         op_type = type(node.op)
         if op_type not in ALLOWED_OPS:
             raise ValueError(f"Unsupported binary operation: {op_type.__name__}")
-        left = self.evaluate(node.left)
-        right = self.evaluate(node.right)
-        op_func = ALLOWED_OPS[op_type]
-        if op_type in (ast.Div, ast.FloorDiv, ast.Mod) and right == 0:
-            raise ZeroDivisionError("Division by zero")
-        return op_func(left, right)
-
-    def eval_UnaryOp(self, node):
+        self.validate(node.left)
+        self.validate(node.right)
+
+    def check_UnaryOp(self, node):
         op_type = type(node.op)
         if op_type not in ALLOWED_OPS:
             raise ValueError(f"Unsupported unary operation: {op_type.__name__}")
-        operand = self.evaluate(node.operand)
-        op_func = ALLOWED_OPS[op_type]
-        return op_func(operand)
+        self.validate(node.operand)
 
-    def eval_Call(self, node):
+    def check_Call(self, node):
         if not isinstance(node.func, ast.Name):
             raise ValueError("Only simple function calls are allowed")
         func_name = node.func.id
         if func_name not in ALLOWED_FUNCTIONS:
             raise ValueError(f"Unsupported function: {func_name}")
-        args = [self.evaluate(arg) for arg in node.args]
-        func = ALLOWED_FUNCTIONS[func_name]
-        try:
-            return func(*args)
-        except Exception as e:
-            raise ValueError(f"Error calling {func_name}: {str(e)}")
+        if node.keywords:
+            raise ValueError(f"Keyword arguments are not supported: {func_name}")
+        for arg in node.args:
+            self.validate(arg)
 
-    def eval_Name(self, node):
+    def check_Name(self, node):
         if node.id not in ALLOWED_CONSTANTS:
             raise ValueError(f"Unsupported constant: {node.id}")
-        return ALLOWED_CONSTANTS[node.id]
 
+    # Handlers keyed by node type, so validate() is one dict lookup per node
+    _DISPATCH = {
+        ast.Expression: check_Expression,
+        ast.Constant: check_Constant,
+        ast.BinOp: check_BinOp,
+        ast.UnaryOp: check_UnaryOp,
+        ast.Call: check_Call,
+        ast.Name: check_Name,
+    }
 
-def safe_evaluate(expression):
-    """Safely evaluate a mathematical expression."""
+
+@functools.lru_cache(maxsize=256)
+def compile_expression(expression):
+    """
+    Parse, validate and compile an expression to a code object.
+
+    Only trees that pass SafeValidator are compiled, so the bytecode can
+    run in CPython's eval loop instead of being walked node by node.
+    """
     expression = expression.replace('^', '**')
     try:
         tree = ast.parse(expression, mode='eval')
     except SyntaxError as e:
         raise SyntaxError(f"Invalid expression syntax: {str(e)}")
-    evaluator = SafeEvaluator()
-    return evaluator.evaluate(tree)
+    SafeValidator().validate(tree)
+    return compile(tree, '<expression>', 'eval')
+
+
+def safe_evaluate(expression):
+    """Safely evaluate a mathematical expression."""
+    return eval(compile_expression(expression), EVAL_NAMESPACE)
 
 
 def request_form(initial_values=None):
@@ -174,14 +230,15 @@ def request_form(initial_values=None):
     }
 
     # Send form request to stdout
-    print(json.dumps(form_request), flush=True)
+    emit(form_request)
+    sys.stdout.buffer.flush()
 
     # Read response from stdin
-    response_line = sys.stdin.readline()
+    response_line = sys.stdin.buffer.readline()
     if not response_line:
         raise RuntimeError("No response received from form")
 
-    response = json.loads(response_line)
+    response = loads(response_line)
 
     if not response.get("__ally_form_response"):
         raise RuntimeError("Invalid form response")
@@ -199,6 +256,14 @@ def format_result(result, fmt, precision):
     if fmt == "scientific":
         return f"{result:.{precision}e}"
     elif fmt == "fraction":
+        # Whole numbers and inf/nan never need the Stern-Brocot search below
+        if isinstance(result, int):
+            return str(int(result))
+        if not math.isfinite(result):
+            return f"{result:.{precision}f}"
+        if result.is_integer():
+            return str(int(result))
+
         # Try to represent as fraction if it's close to a simple fraction
         from fractions import Fraction
         try:
@@ -216,8 +281,8 @@ def main():
     try:
         # Read initial input from stdin (tool arguments)
         # Use readline() instead of json.load() because stdin stays open for form responses
-        input_line = sys.stdin.readline()
-        input_data = json.loads(input_line) if input_line.strip() else {}
+        input_line = sys.stdin.buffer.readline()
+        input_data = loads(input_line) if input_line.strip() else {}
 
         # Build initial values from tool arguments
         initial_values = {}
@@ -229,10 +294,10 @@ def main():
 
         if form_data is None:
             # User cancelled the form
-            print(json.dumps({
+            emit({
                 "success": False,
                 "error": "Calculation cancelled by user"
-            }))
+            })
             sys.exit(0)
 
         # Extract form values
@@ -242,10 +307,10 @@ def main():
         show_steps = form_data.get('show_steps', False)
 
         if not expression:
-            print(json.dumps({
+            emit({
                 "success": False,
                 "error": "No expression provided"
-            }))
+            })
             sys.exit(1)
 
         # Evaluate the expression
@@ -275,41 +340,41 @@ def main():
         else:
             response["message"] = f"{expression} = {formatted}"
 
-        print(json.dumps(response))
+        emit(response)
 
     except ZeroDivisionError:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": "Division by zero"
-        }))
+        })
         sys.exit(1)
 
     except ValueError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Invalid expression: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
     except SyntaxError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Syntax error: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
     except json.JSONDecodeError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Invalid JSON: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
     except Exception as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Error: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
 
@@ -2,15 +2,79 @@
 import json
 import sys
 import re
+import functools
+from tokenize import TokenError
 
 try:
-    import sympy
+    import orjson
 except ImportError:
-    print(json.dumps({
-        "success": False,
-        "error": "SymPy is not installed. Please install it using: pip install sympy"
-    }))
-    sys.exit(1)
+    orjson = None
+
+# A run of 19+ digits may be an integer outside orjson's 64-bit range
+LONG_INTEGER_RE = re.compile(rb'\d{19}')
+
+
+def loads(data):
+    """Parse JSON input, using orjson when it is installed."""
+    # orjson reads integers wider than 64 bits as floats, so leave those to json
+    if orjson is not None and not LONG_INTEGER_RE.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def emit(response):
+    """Write a JSON response line straight to the stdout buffer."""
+    if orjson is not None:
+        try:
+            sys.stdout.buffer.write(orjson.dumps(response, option=orjson.OPT_APPEND_NEWLINE))
+            return
+        except TypeError:
+            # orjson only handles 64-bit integers; let json encode bignums
+            pass
+    sys.stdout.buffer.write(json.dumps(response).encode('utf-8') + b"\n")
+
+
+# Loaded by require_sympy() once a request passes validation; importing
+# SymPy dominates the startup time of a one-shot call
+sympy = None
+parse_expr = None
+TRANSFORMATIONS = None
+
+
+def require_sympy():
+    """Import SymPy and its expression parser on first use and return the module."""
+    global sympy, parse_expr, TRANSFORMATIONS
+    if sympy is None:
+        try:
+            import sympy as sympy_module
+            from sympy.parsing import sympy_parser
+        except ImportError:
+            raise ValueError("SymPy is not installed. Please install it using: pip install sympy")
+        parse_expr = sympy_parser.parse_expr
+        # Same parser rules sympify() applies to strings, including '^' as power
+        TRANSFORMATIONS = sympy_parser.standard_transformations + (sympy_parser.convert_xor,)
+        sympy = sympy_module
+    return sympy
+
+
+# Common code execution patterns, blocked anywhere in an expression
+DANGEROUS_PATTERNS = [
+    '__', 'import', 'exec', 'eval', 'compile', 'open', 'file',
+    'input', 'raw_input', 'globals', 'locals', 'vars', 'dir',
+    'getattr', 'setattr', 'delattr', 'hasattr', 'callable',
+    'classmethod', 'staticmethod', 'property', 'lambda'
+]
+DANGEROUS_PATTERN_RE = re.compile('|'.join(map(re.escape, DANGEROUS_PATTERNS)))
+
+ALLOWED_EXPRESSION_RE = re.compile(r'^[a-zA-Z0-9\+\-\*/\(\)\.\,\s\^\%]+$')
+
+# Point spellings accepted for limits at infinity
+INFINITY_POINTS = frozenset({'inf', 'infinity'})
+NEGATIVE_INFINITY_POINTS = frozenset({'-inf', '-infinity'})
+
+# Plain numeric points, which can skip the expression parser
+INTEGER_POINT_RE = re.compile(r'[+-]?(?:0|[1-9]\d*)')
+FLOAT_POINT_RE = re.compile(r'[+-]?(?:\d+\.\d*|\.\d+|\d+(?=e))(?:e[+-]?\d+)?')
 
 
 def validate_expression(expr_str):
@@ -25,27 +89,79 @@ def validate_expression(expr_str):
     Raises:
         ValueError: If expression contains dangerous patterns
     """
-    # Remove whitespace for checking
-    check_str = expr_str.replace(' ', '')
+    # Remove all whitespace and lowercase once for checking
+    check_str = ''.join(expr_str.split()).lower()
 
     # Block common code execution patterns
-    dangerous_patterns = [
-        '__', 'import', 'exec', 'eval', 'compile', 'open', 'file',
-        'input', 'raw_input', 'globals', 'locals', 'vars', 'dir',
-        'getattr', 'setattr', 'delattr', 'hasattr', 'callable',
-        'classmethod', 'staticmethod', 'property', 'lambda'
-    ]
-
-    for pattern in dangerous_patterns:
-        if pattern in check_str.lower():
-            raise ValueError(f"Invalid expression: contains forbidden pattern '{pattern}'")
+    match = DANGEROUS_PATTERN_RE.search(check_str)
+    if match:
+        raise ValueError(f"Invalid expression: contains forbidden pattern '{match.group(0)}'")
 
     # Allow only: letters, numbers, basic operators, parentheses, and common math functions
-    allowed_pattern = r'^[a-zA-Z0-9\+\-\*/\(\)\.\,\s\^\%]+$'
-    if not re.match(allowed_pattern, expr_str):
+    if not ALLOWED_EXPRESSION_RE.match(expr_str):
         raise ValueError("Invalid expression: contains forbidden characters")
 
 
+@functools.lru_cache(maxsize=512)
+def parse_expression(expr_str):
+    """Parse a validated expression string, reusing earlier parses."""
+    try:
+        return parse_expr(expr_str, local_dict={}, transformations=TRANSFORMATIONS)
+    except (SyntaxError, TokenError):
+        raise ValueError(f"Invalid expression syntax: could not parse '{expr_str}'")
+
+
+@functools.lru_cache(maxsize=64)
+def get_symbol(name):
+    """Return the SymPy symbol for a variable name, reusing earlier ones."""
+    return sympy.Symbol(name)
+
+
+@functools.lru_cache(maxsize=512, typed=True)
+def evaluate_limit(expression_str, variable_str, point, dir_arg):
+    """
+    Compute the limit of a validated expression, reusing earlier results.
+
+    Results are memoized on the raw arguments, so a repeated query skips
+    sympy.limit() entirely. The point must already be validated.
+
+    Args:
+        expression_str: String containing the mathematical expression
+        variable_str: String representing the variable
+        point: Point to evaluate the limit at (number or string)
+        dir_arg: '+' or '-' for a one-sided limit, None for two-sided
+
+    Returns:
+        Tuple of (limit, parsed limit point)
+    """
+    require_sympy()
+    expr = parse_expression(expression_str)
+    variable = get_symbol(variable_str)
+
+    # Parse the point, sending only non-numeric strings through the parser
+    if isinstance(point, str):
+        point_str = point.strip().lower()
+        if point_str in INFINITY_POINTS:
+            limit_point = sympy.oo
+        elif point_str in NEGATIVE_INFINITY_POINTS:
+            limit_point = -sympy.oo
+        elif INTEGER_POINT_RE.fullmatch(point_str):
+            limit_point = sympy.Integer(int(point_str))
+        elif FLOAT_POINT_RE.fullmatch(point_str):
+            limit_point = sympy.Float(point_str)
+        else:
+            limit_point = parse_expression(point)
+    else:
+        limit_point = point
+
+    if dir_arg:
+        result = sympy.limit(expr, variable, limit_point, dir=dir_arg)
+    else:
+        result = sympy.limit(expr, variable, limit_point)
+
+    return result, limit_point
+
+
 def compute_limit(expression_str, variable_str='x', point='0', direction=None):
     """
     Compute the limit of a mathematical expression using SymPy.
@@ -63,26 +179,11 @@ def compute_limit(expression_str, variable_str='x', point='0', direction=None):
         # Validate expression
         validate_expression(expression_str)
 
-        # Parse the expression using SymPy with restricted namespace
-        safe_locals = {}
-        expr = sympy.sympify(expression_str, locals=safe_locals)
-
-        # Define the variable
-        variable = sympy.Symbol(variable_str)
-
-        # Parse the point
+        # Validate the point unless it names infinity
         if isinstance(point, str):
             point_str = point.strip().lower()
-            if point_str == 'inf' or point_str == 'infinity':
-                limit_point = sympy.oo
-            elif point_str == '-inf' or point_str == '-infinity':
-                limit_point = -sympy.oo
-            else:
-                # Validate and parse as expression
+            if point_str not in INFINITY_POINTS and point_str not in NEGATIVE_INFINITY_POINTS:
                 validate_expression(point)
-                limit_point = sympy.sympify(point, locals=safe_locals)
-        else:
-            limit_point = point
 
         # Determine direction
         if direction is not None:
@@ -97,10 +198,7 @@ def compute_limit(expression_str, variable_str='x', point='0', direction=None):
             dir_arg = None
 
         # Compute the limit
-        if dir_arg:
-            result = sympy.limit(expr, variable, limit_point, dir=dir_arg)
-        else:
-            result = sympy.limit(expr, variable, limit_point)
+        result, limit_point = evaluate_limit(expression_str, variable_str, point, dir_arg)
 
         # Format the result
         result_str = str(result)
@@ -135,60 +233,112 @@ def compute_limit(expression_str, variable_str='x', point='0', direction=None):
         }
 
 
-def main():
-    try:
-        # Read input from stdin
-        input_data = json.load(sys.stdin)
+def handle_request(input_data):
+    """
+    Validate tool arguments and compute the requested limit.
 
-        expression = input_data.get('expression')
-        variable = input_data.get('variable', 'x')
-        point = input_data.get('point', '0')
-        direction = input_data.get('direction')
+    Args:
+        input_data: Dictionary of tool arguments
 
-        # Validate inputs
-        if expression is None:
-            print(json.dumps({
-                "success": False,
-                "error": "Missing required parameter 'expression'"
-            }))
-            sys.exit(1)
+    Returns:
+        Dictionary containing success status and limit or error
+    """
+    expression = input_data.get('expression')
+    variable = input_data.get('variable', 'x')
+    point = input_data.get('point', '0')
+    direction = input_data.get('direction')
+
+    # Validate inputs
+    if expression is None:
+        return {
+            "success": False,
+            "error": "Missing required parameter 'expression'"
+        }
+
+    if not isinstance(expression, str) or not expression.strip():
+        return {
+            "success": False,
+            "error": "Expression must be a non-empty string"
+        }
+
+    if not isinstance(variable, str) or not variable.strip():
+        return {
+            "success": False,
+            "error": "Variable must be a non-empty string"
+        }
+
+    # The memoized evaluator is keyed on the raw point, so anything other than
+    # a number or an expression string would fail as an unhashable key
+    if isinstance(point, bool) or not isinstance(point, (str, int, float)):
+        return {
+            "success": False,
+            "error": "Point must be a number or an expression string"
+        }
+
+    # Compute the limit
+    return compute_limit(expression.strip(), variable.strip(), point, direction)
 
-        if not isinstance(expression, str) or not expression.strip():
-            print(json.dumps({
-                "success": False,
-                "error": "Expression must be a non-empty string"
-            }))
-            sys.exit(1)
 
-        if not isinstance(variable, str) or not variable.strip():
-            print(json.dumps({
+def serve():
+    """
+    Answer newline-delimited JSON requests from stdin until EOF.
+
+    Each input line is one request and each response is written as one line.
+    Keeping the process alive amortizes the SymPy import and reuses parsed
+    expressions across requests.
+    """
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+
+        try:
+            result = handle_request(loads(line))
+        except json.JSONDecodeError as e:
+            result = {
                 "success": False,
-                "error": "Variable must be a non-empty string"
-            }))
-            sys.exit(1)
+                "error": f"Invalid JSON input: {str(e)}"
+            }
+        except Exception as e:
+            result = {
+                "success": False,
+                "error": f"Unexpected error: {str(e)}"
+            }
+
+        emit(result)
+        sys.stdout.buffer.flush()
+
+
+def main():
+    if '--server' in sys.argv[1:]:
+        serve()
+        return
+
+    try:
+        # Read input from stdin
+        input_data = loads(sys.stdin.buffer.read())
 
         # Compute the limit
-        result = compute_limit(expression.strip(), variable.strip(), point, direction)
+        result = handle_request(input_data)
 
         # Return result
-        print(json.dumps(result))
+        emit(result)
 
         # Exit with error code if computation failed
         if not result.get("success", False):
             sys.exit(1)
 
     except json.JSONDecodeError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Invalid JSON input: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
     except Exception as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Unexpected error: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
 
@@ -1,15 +1,302 @@
 #!/usr/bin/env python3
+import ast
 import json
 import sys
+import os
+import re
+import operator
 
 try:
-    import sympy
+    import orjson
 except ImportError:
-    print(json.dumps({
-        "success": False,
-        "error": "SymPy is not installed. Please install it using: pip install sympy"
-    }))
-    sys.exit(1)
+    orjson = None
+
+# A run of 19+ digits may be an integer outside orjson's 64-bit range
+LONG_INTEGER_RE = re.compile(rb'\d{19}')
+
+
+def loads(data):
+    """Parse JSON input, using orjson when it is installed."""
+    # orjson reads integers wider than 64 bits as floats, so leave those to json
+    if orjson is not None and not LONG_INTEGER_RE.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def emit(response):
+    """Write a JSON response line straight to the stdout buffer."""
+    if orjson is not None:
+        try:
+            sys.stdout.buffer.write(orjson.dumps(response, option=orjson.OPT_APPEND_NEWLINE))
+            return
+        except TypeError:
+            # orjson only handles 64-bit integers; let json encode bignums
+            pass
+    sys.stdout.buffer.write(json.dumps(response).encode('utf-8') + b"\n")
+
+
+# Batches smaller than this are not worth starting worker processes for
+PARALLEL_BATCH_SIZE = 4
+
+# Batches longer than this are answered with an error before any work
+MAX_BATCH_SIZE = 256
+BATCH_TOO_LARGE_ERROR = {
+    "success": False,
+    "error": f"Batch too large (limit is {MAX_BATCH_SIZE} matrices)"
+}
+
+# Under --server one worker pool is started on the first large batch and
+# kept until stdin closes, instead of forking new workers per request
+serving = False
+worker_pool = None
+
+# Entries given as text are parsed by sympify, which evaluates Python, so
+# they are held to the same checks as the expression tools
+DANGEROUS_PATTERNS = [
+    '__', 'import', 'exec', 'eval', 'compile', 'open', 'file',
+    'input', 'raw_input', 'globals', 'locals', 'vars', 'dir',
+    'getattr', 'setattr', 'delattr', 'hasattr', 'callable',
+    'classmethod', 'staticmethod', 'property', 'lambda'
+]
+DANGEROUS_PATTERN_RE = re.compile('|'.join(map(re.escape, DANGEROUS_PATTERNS)))
+
+ALLOWED_EXPRESSION_RE = re.compile(r'^[a-zA-Z0-9\+\-\*/\(\)\.\,\s\^\%]+$')
+
+# SymPy evaluates numeric powers while parsing, so a power tower such as
+# 9**9**9 or a huge literal exponent never returns. Numeric exponents above
+# this bound are rejected.
+MAX_NUMERIC_EXPONENT = 10000
+
+# Arithmetic a literal-only exponent is evaluated with to compare it to the bound
+EXPONENT_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+}
+
+# Syntax tree nodes an arithmetic expression may contain
+ALLOWED_AST_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load,
+    ast.Constant, ast.Tuple, ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.FloorDiv, ast.Mod, ast.Pow, ast.BitXor, ast.UAdd, ast.USub
+)
+
+# Functions an expression may call. Single-letter names are also allowed,
+# since SymPy treats them as undefined functions (e.g. f(x)).
+ALLOWED_FUNCTIONS = frozenset({
+    'sin', 'cos', 'tan', 'cot', 'sec', 'csc',
+    'asin', 'acos', 'atan', 'acot', 'asec', 'acsc', 'atan2',
+    'sinh', 'cosh', 'tanh', 'coth', 'sech', 'csch',
+    'asinh', 'acosh', 'atanh', 'acoth',
+    'exp', 'log', 'ln', 'sqrt', 'cbrt', 'root',
+    'abs', 'Abs', 'sign', 'floor', 'ceiling', 'Min', 'Max', 're', 'im',
+    'factorial', 'binomial', 'gamma', 'erf', 'erfc', 'Heaviside',
+    'Rational',
+})
+
+# Integer matrices never need SymPy, so it is only imported for the general path
+sympy = None
+
+
+def require_sympy():
+    """Import SymPy on first use and return the module."""
+    global sympy
+    if sympy is None:
+        try:
+            import sympy as sympy_module
+        except ImportError:
+            raise ValueError("SymPy is not installed. Please install it using: pip install sympy")
+        sympy = sympy_module
+    return sympy
+
+
+def integer_determinant(rows):
+    """
+    Compute the exact determinant of a square integer matrix.
+
+    Uses Bareiss fraction-free elimination on plain Python ints, so every
+    intermediate division is exact and no SymPy objects are created.
+
+    Args:
+        rows: Square 2D list of ints
+
+    Returns:
+        Determinant as an int
+    """
+    n = len(rows)
+    m = [list(row) for row in rows]
+    sign = 1
+    prev_pivot = 1
+
+    for k in range(n - 1):
+        # Swap in a row with a non-zero pivot, or the determinant is zero
+        if m[k][k] == 0:
+            for i in range(k + 1, n):
+                if m[i][k] != 0:
+                    m[k], m[i] = m[i], m[k]
+                    sign = -sign
+                    break
+            else:
+                return 0
+
+        pivot = m[k][k]
+        pivot_row = m[k]
+        for i in range(k + 1, n):
+            row = m[i]
+            factor = row[k]
+            for j in range(k + 1, n):
+                row[j] = (row[j] * pivot - factor * pivot_row[j]) // prev_pivot
+        prev_pivot = pivot
+
+    return sign * m[n - 1][n - 1]
+
+
+def literal_value(node):
+    """
+    Evaluate a syntax tree built only from numeric literals and arithmetic.
+
+    Returns:
+        The numeric value, or None if the tree involves names, calls or tuples
+    """
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.UnaryOp):
+        operand = literal_value(node.operand)
+        if operand is None:
+            return None
+        return -operand if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.BinOp) and type(node.op) in EXPONENT_OPERATORS:
+        left = literal_value(node.left)
+        right = literal_value(node.right)
+        if left is None or right is None:
+            return None
+        return EXPONENT_OPERATORS[type(node.op)](left, right)
+    return None
+
+
+def check_exponent(exponent):
+    """
+    Reject a numeric exponent that SymPy could not evaluate in reasonable time.
+
+    Exponents that mention a name (x**n, 2**x, x**pi) stay symbolic and are
+    left alone. A numeric exponent may not contain a power itself and its
+    value must not exceed MAX_NUMERIC_EXPONENT.
+
+    Raises:
+        ValueError: If the exponent is too large to evaluate
+    """
+    nodes = list(ast.walk(exponent))
+    if any(isinstance(node, ast.Name) for node in nodes):
+        return
+
+    error = ValueError("Invalid expression: numeric exponent is too large to evaluate")
+    if any(isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow) for node in nodes):
+        raise error
+
+    try:
+        value = literal_value(exponent)
+    except ZeroDivisionError:
+        # SymPy reports this itself (as zoo or nan)
+        return
+    except OverflowError:
+        raise error
+    if value is not None and abs(value) > MAX_NUMERIC_EXPONENT:
+        raise error
+
+
+def validate_cell_text(text):
+    """
+    Check that a matrix entry given as text is plain math before sympify sees it.
+
+    Applies the forbidden-pattern scan and character whitelist, then parses
+    the text (reading ^ as **, like SymPy) and accepts only arithmetic,
+    numeric literals, calls to ALLOWED_FUNCTIONS and bounded numeric
+    exponents. Text that is not valid Python is left for sympify to reject.
+
+    Args:
+        text: Matrix entry string
+
+    Raises:
+        ValueError: If the entry is not a safe expression
+    """
+    match = DANGEROUS_PATTERN_RE.search(''.join(text.split()).lower())
+    if match:
+        raise ValueError(f"Invalid expression: contains forbidden pattern '{match.group(0)}'")
+
+    if not ALLOWED_EXPRESSION_RE.match(text):
+        raise ValueError("Invalid expression: contains forbidden characters")
+
+    try:
+        tree = ast.parse(text.strip().replace('^', '**'), mode='eval')
+    except SyntaxError:
+        return
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_AST_NODES):
+            raise ValueError(f"Invalid expression: {type(node).__name__} syntax is not allowed")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, complex)):
+            raise ValueError("Invalid expression: only numeric literals are allowed")
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            check_exponent(node.right)
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name):
+                raise ValueError("Invalid expression: only calls to named functions are allowed")
+            if node.func.id not in ALLOWED_FUNCTIONS and len(node.func.id) != 1:
+                raise ValueError(f"Invalid expression: unsupported function '{node.func.id}'")
+
+
+def coerce_cell(value):
+    """Convert a matrix entry to SymPy, building plain numbers directly instead of via sympify."""
+    value_type = type(value)
+    if value_type is int:
+        return sympy.Integer(value)
+    if value_type is float:
+        return sympy.Float(value)
+    if value_type is str:
+        validate_cell_text(value)
+        return sympy.sympify(value)
+    raise ValueError("entries must be numbers or expression strings")
+
+
+def coerce_rows(matrix_data):
+    """
+    Convert every matrix entry to SymPy.
+
+    Raises:
+        ValueError: Naming the row and column of the first invalid entry
+    """
+    rows = []
+    for i, row in enumerate(matrix_data, 1):
+        converted = []
+        for j, value in enumerate(row, 1):
+            try:
+                converted.append(coerce_cell(value))
+            except ValueError as e:
+                raise ValueError(f"Invalid matrix entry at row {i}, column {j}: {e}")
+        rows.append(converted)
+    return rows
+
+
+def choose_det_method(matrix):
+    """
+    Pick the determinant algorithm that suits a matrix's entries.
+
+    Division-free Berkowitz is quickest for small exact and symbolic
+    matrices, although simplifying its expanded symbolic result costs more
+    than Bareiss beyond 5×5. LU wins on larger exact matrices. Bareiss stays
+    the choice for floats, where the alternatives are no faster and round
+    differently.
+
+    Args:
+        matrix: Square SymPy matrix
+
+    Returns:
+        Method name accepted by Matrix.det
+    """
+    if matrix.free_symbols:
+        return 'berkowitz' if matrix.rows <= 5 else 'bareiss'
+    if matrix.has(sympy.Float):
+        return 'bareiss'
+    return 'berkowitz' if matrix.rows <= 6 else 'lu'
 
 
 def compute_determinant(matrix_data):
@@ -36,8 +323,21 @@ def compute_determinant(matrix_data):
             if not all(len(row) == row_length for row in matrix_data):
                 raise ValueError("All rows must have the same length")
 
+        # Integer matrices have an exact answer without going through SymPy
+        size = len(matrix_data)
+        if size <= 10 and len(matrix_data[0]) == size and \
+                all(type(value) is int for row in matrix_data for value in row):
+            det = integer_determinant(matrix_data)
+            return {
+                "success": True,
+                "determinant": str(det),
+                "matrix_size": f"{size}×{size}",
+                "is_singular": det == 0
+            }
+
         # Create SymPy matrix
-        matrix = sympy.Matrix(matrix_data)
+        require_sympy()
+        matrix = sympy.ImmutableMatrix(coerce_rows(matrix_data))
 
         # Check if matrix is square (required for determinant)
         if matrix.rows != matrix.cols:
@@ -48,10 +348,13 @@ def compute_determinant(matrix_data):
             raise ValueError("Matrix size limited to 10×10 for performance reasons")
 
         # Compute determinant
-        det = matrix.det()
+        det = matrix.det(method=choose_det_method(matrix))
 
-        # Simplify the result
-        simplified_det = sympy.simplify(det)
+        # Simplify symbolic results; a numeric determinant is already canonical
+        if matrix.free_symbols:
+            simplified_det = sympy.simplify(det)
+        else:
+            simplified_det = det
 
         return {
             "success": True,
@@ -72,43 +375,133 @@ def compute_determinant(matrix_data):
         }
 
 
-def main():
+def compute_determinants(matrices):
+    """
+    Compute the determinants of a batch of independent matrices.
+
+    SymPy's elimination is pure Python and holds the GIL, so batches large
+    enough to amortize the startup cost are spread across worker processes.
+    A one-shot run starts a pool for the batch; a server reuses one pool.
+
+    Args:
+        matrices: List of 2D lists
+
+    Returns:
+        List of result dictionaries, in input order
+    """
+    if len(matrices) < PARALLEL_BATCH_SIZE:
+        return [compute_determinant(matrix) for matrix in matrices]
+
+    global worker_pool
+    from multiprocessing import Pool
+    if not serving:
+        with Pool(min(len(matrices), os.cpu_count() or 1)) as pool:
+            return pool.map(compute_determinant, matrices, chunksize=4)
+
+    if worker_pool is None:
+        worker_pool = Pool(os.cpu_count() or 1)
+    return worker_pool.map(compute_determinant, matrices, chunksize=4)
+
+
+def handle_request(input_data):
+    """
+    Validate tool arguments and compute the requested determinant.
+
+    A top-level list is treated as a batch of matrices.
+
+    Args:
+        input_data: Dictionary of tool arguments, or a list of matrices
+
+    Returns:
+        Dictionary containing success status and determinant or error,
+        or a list of them for a batch
+    """
+    if isinstance(input_data, list):
+        if len(input_data) > MAX_BATCH_SIZE:
+            return BATCH_TOO_LARGE_ERROR
+        return compute_determinants(input_data)
+
+    matrix = input_data.get('matrix')
+
+    # Validate inputs
+    if matrix is None:
+        return {
+            "success": False,
+            "error": "Missing required parameter 'matrix'"
+        }
+
+    # Compute determinant
+    return compute_determinant(matrix)
+
+
+def serve():
+    """
+    Answer newline-delimited JSON requests from stdin until EOF.
+
+    Each input line is one request and each response is written as one line.
+    Keeping the process alive amortizes the SymPy import and the batch
+    worker pool across requests.
+    """
+    global serving
+    serving = True
     try:
-        # Read input from stdin
-        input_data = json.load(sys.stdin)
+        for line in sys.stdin.buffer:
+            if not line.strip():
+                continue
 
-        matrix = input_data.get('matrix')
+            try:
+                result = handle_request(loads(line))
+            except json.JSONDecodeError as e:
+                result = {
+                    "success": False,
+                    "error": f"Invalid JSON input: {str(e)}"
+                }
+            except Exception as e:
+                result = {
+                    "success": False,
+                    "error": f"Unexpected error: {str(e)}"
+                }
 
-        # Validate inputs
-        if matrix is None:
-            print(json.dumps({
-                "success": False,
-                "error": "Missing required parameter 'matrix'"
-            }))
-            sys.exit(1)
+            emit(result)
+            sys.stdout.buffer.flush()
+    finally:
+        if worker_pool is not None:
+            worker_pool.close()
+            worker_pool.join()
+
+
+def main():
+    if '--server' in sys.argv[1:]:
+        serve()
+        return
+
+    try:
+        # Read input from stdin
+        input_data = loads(sys.stdin.buffer.read())
 
         # Compute determinant
-        result = compute_determinant(matrix)
+        result = handle_request(input_data)
 
         # Return result
-        print(json.dumps(result))
+        emit(result)
 
         # Exit with error code if computation failed
-        if not result.get("success", False):
+        results = result if isinstance(result, list) else [result]
+        if not all(r.get("success", False) for r in results):
             sys.exit(1)
 
     except json.JSONDecodeError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Invalid JSON input: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
     except Exception as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Unexpected error: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
 
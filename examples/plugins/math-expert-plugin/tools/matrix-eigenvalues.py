@@ -1,15 +1,264 @@
 #!/usr/bin/env python3
+import ast
 import json
 import sys
+import re
+import operator
+import functools
 
 try:
-    import sympy
+    import orjson
 except ImportError:
-    print(json.dumps({
-        "success": False,
-        "error": "SymPy is not installed. Please install it using: pip install sympy"
-    }))
-    sys.exit(1)
+    orjson = None
+
+# A run of 19+ digits may be an integer outside orjson's 64-bit range
+LONG_INTEGER_RE = re.compile(rb'\d{19}')
+
+# Requests larger than this are answered with an error before any parsing
+MAX_INPUT_BYTES = 64 * 1024
+INPUT_TOO_LARGE_ERROR = {
+    "success": False,
+    "error": f"Input too large (limit is {MAX_INPUT_BYTES} bytes)"
+}
+
+
+def loads(data):
+    """Parse JSON input, using orjson when it is installed."""
+    # orjson reads integers wider than 64 bits as floats, so leave those to json
+    if orjson is not None and not LONG_INTEGER_RE.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def emit(response):
+    """Write a JSON response line straight to the stdout buffer."""
+    if orjson is not None:
+        try:
+            sys.stdout.buffer.write(orjson.dumps(response, option=orjson.OPT_APPEND_NEWLINE))
+            return
+        except TypeError:
+            # orjson only handles 64-bit integers; let json encode bignums
+            pass
+    sys.stdout.buffer.write(json.dumps(response).encode('utf-8') + b"\n")
+
+
+# Entries given as text are parsed by sympify, which evaluates Python, so
+# they are held to the same checks as the expression tools
+DANGEROUS_PATTERNS = [
+    '__', 'import', 'exec', 'eval', 'compile', 'open', 'file',
+    'input', 'raw_input', 'globals', 'locals', 'vars', 'dir',
+    'getattr', 'setattr', 'delattr', 'hasattr', 'callable',
+    'classmethod', 'staticmethod', 'property', 'lambda'
+]
+DANGEROUS_PATTERN_RE = re.compile('|'.join(map(re.escape, DANGEROUS_PATTERNS)))
+
+ALLOWED_EXPRESSION_RE = re.compile(r'^[a-zA-Z0-9\+\-\*/\(\)\.\,\s\^\%]+$')
+
+# SymPy evaluates numeric powers while parsing, so a power tower such as
+# 9**9**9 or a huge literal exponent never returns. Numeric exponents above
+# this bound are rejected.
+MAX_NUMERIC_EXPONENT = 10000
+
+# Arithmetic a literal-only exponent is evaluated with to compare it to the bound
+EXPONENT_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+}
+
+# Syntax tree nodes an arithmetic expression may contain
+ALLOWED_AST_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load,
+    ast.Constant, ast.Tuple, ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.FloorDiv, ast.Mod, ast.Pow, ast.BitXor, ast.UAdd, ast.USub
+)
+
+# Functions an expression may call. Single-letter names are also allowed,
+# since SymPy treats them as undefined functions (e.g. f(x)).
+ALLOWED_FUNCTIONS = frozenset({
+    'sin', 'cos', 'tan', 'cot', 'sec', 'csc',
+    'asin', 'acos', 'atan', 'acot', 'asec', 'acsc', 'atan2',
+    'sinh', 'cosh', 'tanh', 'coth', 'sech', 'csch',
+    'asinh', 'acosh', 'atanh', 'acoth',
+    'exp', 'log', 'ln', 'sqrt', 'cbrt', 'root',
+    'abs', 'Abs', 'sign', 'floor', 'ceiling', 'Min', 'Max', 're', 'im',
+    'factorial', 'binomial', 'gamma', 'erf', 'erfc', 'Heaviside',
+    'Rational',
+})
+
+# SymPy is imported on first use so rejected input never pays for the import
+sympy = None
+
+
+def require_sympy():
+    """Import SymPy on first use and return the module."""
+    global sympy
+    if sympy is None:
+        try:
+            import sympy as sympy_module
+        except ImportError:
+            raise ValueError("SymPy is not installed. Please install it using: pip install sympy")
+        sympy = sympy_module
+    return sympy
+
+
+@functools.lru_cache(maxsize=256, typed=True)
+def simplify_entry(entry):
+    """
+    Simplify a single matrix entry, memoizing repeated entries.
+
+    Atoms (numbers, constants such as pi, and bare symbols) are already in
+    simplest form, so they skip sympy.simplify() and its expression-tree
+    traversals. Compound numeric expressions still go through simplify(),
+    which can legitimately rewrite them.
+    """
+    if entry.is_Atom:
+        return entry
+    return sympy.simplify(entry)
+
+
+def literal_value(node):
+    """
+    Evaluate a syntax tree built only from numeric literals and arithmetic.
+
+    Returns:
+        The numeric value, or None if the tree involves names, calls or tuples
+    """
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.UnaryOp):
+        operand = literal_value(node.operand)
+        if operand is None:
+            return None
+        return -operand if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.BinOp) and type(node.op) in EXPONENT_OPERATORS:
+        left = literal_value(node.left)
+        right = literal_value(node.right)
+        if left is None or right is None:
+            return None
+        return EXPONENT_OPERATORS[type(node.op)](left, right)
+    return None
+
+
+def check_exponent(exponent):
+    """
+    Reject a numeric exponent that SymPy could not evaluate in reasonable time.
+
+    Exponents that mention a name (x**n, 2**x, x**pi) stay symbolic and are
+    left alone. A numeric exponent may not contain a power itself and its
+    value must not exceed MAX_NUMERIC_EXPONENT.
+
+    Raises:
+        ValueError: If the exponent is too large to evaluate
+    """
+    nodes = list(ast.walk(exponent))
+    if any(isinstance(node, ast.Name) for node in nodes):
+        return
+
+    error = ValueError("Invalid expression: numeric exponent is too large to evaluate")
+    if any(isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow) for node in nodes):
+        raise error
+
+    try:
+        value = literal_value(exponent)
+    except ZeroDivisionError:
+        # SymPy reports this itself (as zoo or nan)
+        return
+    except OverflowError:
+        raise error
+    if value is not None and abs(value) > MAX_NUMERIC_EXPONENT:
+        raise error
+
+
+def validate_cell_text(text):
+    """
+    Check that a matrix entry given as text is plain math before sympify sees it.
+
+    Applies the forbidden-pattern scan and character whitelist, then parses
+    the text (reading ^ as **, like SymPy) and accepts only arithmetic,
+    numeric literals, calls to ALLOWED_FUNCTIONS and bounded numeric
+    exponents. Text that is not valid Python is left for sympify to reject.
+
+    Args:
+        text: Matrix entry string
+
+    Raises:
+        ValueError: If the entry is not a safe expression
+    """
+    match = DANGEROUS_PATTERN_RE.search(''.join(text.split()).lower())
+    if match:
+        raise ValueError(f"Invalid expression: contains forbidden pattern '{match.group(0)}'")
+
+    if not ALLOWED_EXPRESSION_RE.match(text):
+        raise ValueError("Invalid expression: contains forbidden characters")
+
+    try:
+        tree = ast.parse(text.strip().replace('^', '**'), mode='eval')
+    except SyntaxError:
+        return
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_AST_NODES):
+            raise ValueError(f"Invalid expression: {type(node).__name__} syntax is not allowed")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, complex)):
+            raise ValueError("Invalid expression: only numeric literals are allowed")
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            check_exponent(node.right)
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name):
+                raise ValueError("Invalid expression: only calls to named functions are allowed")
+            if node.func.id not in ALLOWED_FUNCTIONS and len(node.func.id) != 1:
+                raise ValueError(f"Invalid expression: unsupported function '{node.func.id}'")
+
+
+def validate_entries(matrix_data, label='matrix'):
+    """
+    Check every entry before SymPy converts the matrix.
+
+    Numbers pass as they are; strings must pass validate_cell_text().
+
+    Args:
+        matrix_data: 2D list representing the matrix
+        label: Name used for the matrix in error messages
+
+    Raises:
+        ValueError: Naming the row and column of the first invalid entry
+    """
+    for i, row in enumerate(matrix_data, 1):
+        for j, value in enumerate(row, 1):
+            value_type = type(value)
+            if value_type is int or value_type is float:
+                continue
+            try:
+                if value_type is not str:
+                    raise ValueError("entries must be numbers or expression strings")
+                validate_cell_text(value)
+            except ValueError as e:
+                raise ValueError(f"Invalid {label} entry at row {i}, column {j}: {e}")
+
+
+def matrix_key(matrix_data):
+    """
+    Build a hashable cache key for a list-of-lists matrix.
+
+    Entries are paired with their types so 1, 1.0 and True stay distinct.
+
+    Returns:
+        Tuple of row tuples, or None if the input is not a list of lists of
+        hashable values
+    """
+    if not isinstance(matrix_data, list) or not all(isinstance(row, list) for row in matrix_data):
+        return None
+    key = tuple(tuple((type(value), value) for value in row) for row in matrix_data)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def rows_from_key(key):
+    """Rebuild the list-of-lists matrix described by a matrix_key()."""
+    return [[value for _, value in row] for row in key]
 
 
 def compute_eigenvalues(matrix_data, include_eigenvectors=False):
@@ -28,26 +277,31 @@ def compute_eigenvalues(matrix_data, include_eigenvectors=False):
         if not matrix_data or not isinstance(matrix_data, list):
             raise ValueError("Matrix must be a 2D array (list of lists)")
 
-        if not all(isinstance(row, list) for row in matrix_data):
-            raise ValueError("Matrix must be a 2D array (each row must be a list)")
+        # Check that every row is a list and all rows have the same length in
+        # one pass, still reporting a non-list row before a length mismatch
+        row_length = len(matrix_data[0]) if isinstance(matrix_data[0], list) else None
+        same_length = True
+        for row in matrix_data:
+            if not isinstance(row, list):
+                raise ValueError("Matrix must be a 2D array (each row must be a list)")
+            if len(row) != row_length:
+                same_length = False
+        if not same_length:
+            raise ValueError("All rows must have the same length")
 
-        # Check that all rows have the same length
-        if len(matrix_data) > 0:
-            row_length = len(matrix_data[0])
-            if not all(len(row) == row_length for row in matrix_data):
-                raise ValueError("All rows must have the same length")
+        # Size limit for performance, checked before SymPy allocates any entries
+        if len(matrix_data) > 10 or len(matrix_data[0]) > 10:
+            raise ValueError("Matrix size limited to 10×10 for performance reasons")
 
         # Create SymPy matrix
+        validate_entries(matrix_data)
+        require_sympy()
         matrix = sympy.Matrix(matrix_data)
 
         # Check if matrix is square (required for eigenvalues)
         if matrix.rows != matrix.cols:
             raise ValueError(f"Matrix must be square to compute eigenvalues (got {matrix.rows}×{matrix.cols})")
 
-        # Size limit for performance
-        if matrix.rows > 10:
-            raise ValueError("Matrix size limited to 10×10 for performance reasons")
-
         if include_eigenvectors:
             # Compute eigenvalues and eigenvectors
             # eigenvects() returns list of tuples: (eigenvalue, multiplicity, [eigenvectors])
@@ -57,16 +311,17 @@ def compute_eigenvalues(matrix_data, include_eigenvectors=False):
             eigenvectors_list = []
 
             for eigenval, multiplicity, eigenvecs in eigenvects:
+                value = str(simplify_entry(eigenval))
                 eigenvalues_list.append({
-                    "value": str(sympy.simplify(eigenval)),
+                    "value": value,
                     "multiplicity": multiplicity
                 })
 
                 # Convert eigenvectors to list format
                 for eigenvec in eigenvecs:
-                    vector = [str(sympy.simplify(eigenvec[i])) for i in range(eigenvec.rows)]
+                    vector = [str(simplify_entry(entry)) for entry in eigenvec]
                     eigenvectors_list.append({
-                        "eigenvalue": str(sympy.simplify(eigenval)),
+                        "eigenvalue": value,
                         "vector": vector
                     })
 
@@ -84,7 +339,7 @@ def compute_eigenvalues(matrix_data, include_eigenvectors=False):
             eigenvalues_list = []
             for eigenval, multiplicity in eigenvals_dict.items():
                 eigenvalues_list.append({
-                    "value": str(sympy.simplify(eigenval)),
+                    "value": str(simplify_entry(eigenval)),
                     "multiplicity": multiplicity
                 })
 
@@ -106,51 +361,115 @@ def compute_eigenvalues(matrix_data, include_eigenvectors=False):
         }
 
 
-def main():
-    try:
-        # Read input from stdin
-        input_data = json.load(sys.stdin)
+@functools.lru_cache(maxsize=128)
+def cached_eigenvalues(key, include_eigenvectors):
+    """Memoized compute_eigenvalues for a matrix_key(), kept as JSON bytes so every hit gets a fresh copy."""
+    return json.dumps(compute_eigenvalues(rows_from_key(key), include_eigenvectors)).encode('utf-8')
 
-        matrix = input_data.get('matrix')
-        include_eigenvectors = input_data.get('include_eigenvectors', False)
 
-        # Validate inputs
-        if matrix is None:
-            print(json.dumps({
-                "success": False,
-                "error": "Missing required parameter 'matrix'"
-            }))
-            sys.exit(1)
+def handle_request(input_data):
+    """
+    Validate tool arguments and compute the eigenvalues.
+
+    Args:
+        input_data: Dictionary of tool arguments
+
+    Returns:
+        Dictionary containing success status and eigenvalues or error
+    """
+    matrix = input_data.get('matrix')
+    include_eigenvectors = input_data.get('include_eigenvectors', False)
+
+    # Validate inputs
+    if matrix is None:
+        return {
+            "success": False,
+            "error": "Missing required parameter 'matrix'"
+        }
+
+    if not isinstance(include_eigenvectors, bool):
+        return {
+            "success": False,
+            "error": "include_eigenvectors must be a boolean"
+        }
+
+    # Compute eigenvalues (and eigenvectors if requested), reusing the
+    # result for a matrix seen before
+    key = matrix_key(matrix)
+    if key is not None:
+        return loads(cached_eigenvalues(key, include_eigenvectors))
+    return compute_eigenvalues(matrix, include_eigenvectors)
+
+
+def serve():
+    """
+    Answer newline-delimited JSON requests from stdin until EOF.
+
+    Each input line is one request and each response is written as one line.
+    Keeping the process alive amortizes the SymPy import and reuses
+    memoized eigenvalues across requests.
+    """
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+
+        if len(line) > MAX_INPUT_BYTES:
+            emit(INPUT_TOO_LARGE_ERROR)
+            sys.stdout.buffer.flush()
+            continue
 
-        if not isinstance(include_eigenvectors, bool):
-            print(json.dumps({
+        try:
+            result = handle_request(loads(line))
+        except json.JSONDecodeError as e:
+            result = {
                 "success": False,
-                "error": "include_eigenvectors must be a boolean"
-            }))
+                "error": f"Invalid JSON input: {str(e)}"
+            }
+        except Exception as e:
+            result = {
+                "success": False,
+                "error": f"Unexpected error: {str(e)}"
+            }
+
+        emit(result)
+        sys.stdout.buffer.flush()
+
+
+def main():
+    if '--server' in sys.argv[1:]:
+        serve()
+        return
+
+    try:
+        # Read input from stdin, stopping as soon as it is over the limit
+        data = sys.stdin.buffer.read(MAX_INPUT_BYTES + 1)
+        if len(data) > MAX_INPUT_BYTES:
+            emit(INPUT_TOO_LARGE_ERROR)
             sys.exit(1)
+        input_data = loads(data)
 
-        # Compute eigenvalues (and eigenvectors if requested)
-        result = compute_eigenvalues(matrix, include_eigenvectors)
+        # Compute eigenvalues
+        result = handle_request(input_data)
 
         # Return result
-        print(json.dumps(result))
+        emit(result)
 
         # Exit with error code if computation failed
         if not result.get("success", False):
             sys.exit(1)
 
     except json.JSONDecodeError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Invalid JSON input: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
     except Exception as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Unexpected error: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
 
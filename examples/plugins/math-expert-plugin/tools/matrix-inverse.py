@@ -1,15 +1,357 @@
 #!/usr/bin/env python3
+import ast
 import json
 import sys
+import re
+import operator
+import functools
+from fractions import Fraction
 
 try:
-    import sympy
+    import orjson
 except ImportError:
-    print(json.dumps({
-        "success": False,
-        "error": "SymPy is not installed. Please install it using: pip install sympy"
-    }))
-    sys.exit(1)
+    orjson = None
+
+# A run of 19+ digits may be an integer outside orjson's 64-bit range
+LONG_INTEGER_RE = re.compile(rb'\d{19}')
+
+# Requests larger than this are answered with an error before any parsing
+MAX_INPUT_BYTES = 64 * 1024
+INPUT_TOO_LARGE_ERROR = {
+    "success": False,
+    "error": f"Input too large (limit is {MAX_INPUT_BYTES} bytes)"
+}
+
+
+def loads(data):
+    """Parse JSON input, using orjson when it is installed."""
+    # orjson reads integers wider than 64 bits as floats, so leave those to json
+    if orjson is not None and not LONG_INTEGER_RE.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def emit(response):
+    """Write a JSON response line straight to the stdout buffer."""
+    if orjson is not None:
+        try:
+            sys.stdout.buffer.write(orjson.dumps(response, option=orjson.OPT_APPEND_NEWLINE))
+            return
+        except TypeError:
+            # orjson only handles 64-bit integers; let json encode bignums
+            pass
+    sys.stdout.buffer.write(json.dumps(response).encode('utf-8') + b"\n")
+
+
+# Entries given as text are parsed by sympify, which evaluates Python, so
+# they are held to the same checks as the expression tools
+DANGEROUS_PATTERNS = [
+    '__', 'import', 'exec', 'eval', 'compile', 'open', 'file',
+    'input', 'raw_input', 'globals', 'locals', 'vars', 'dir',
+    'getattr', 'setattr', 'delattr', 'hasattr', 'callable',
+    'classmethod', 'staticmethod', 'property', 'lambda'
+]
+DANGEROUS_PATTERN_RE = re.compile('|'.join(map(re.escape, DANGEROUS_PATTERNS)))
+
+ALLOWED_EXPRESSION_RE = re.compile(r'^[a-zA-Z0-9\+\-\*/\(\)\.\,\s\^\%]+$')
+
+# SymPy evaluates numeric powers while parsing, so a power tower such as
+# 9**9**9 or a huge literal exponent never returns. Numeric exponents above
+# this bound are rejected.
+MAX_NUMERIC_EXPONENT = 10000
+
+# Arithmetic a literal-only exponent is evaluated with to compare it to the bound
+EXPONENT_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+}
+
+# Syntax tree nodes an arithmetic expression may contain
+ALLOWED_AST_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load,
+    ast.Constant, ast.Tuple, ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.FloorDiv, ast.Mod, ast.Pow, ast.BitXor, ast.UAdd, ast.USub
+)
+
+# Functions an expression may call. Single-letter names are also allowed,
+# since SymPy treats them as undefined functions (e.g. f(x)).
+ALLOWED_FUNCTIONS = frozenset({
+    'sin', 'cos', 'tan', 'cot', 'sec', 'csc',
+    'asin', 'acos', 'atan', 'acot', 'asec', 'acsc', 'atan2',
+    'sinh', 'cosh', 'tanh', 'coth', 'sech', 'csch',
+    'asinh', 'acosh', 'atanh', 'acoth',
+    'exp', 'log', 'ln', 'sqrt', 'cbrt', 'root',
+    'abs', 'Abs', 'sign', 'floor', 'ceiling', 'Min', 'Max', 're', 'im',
+    'factorial', 'binomial', 'gamma', 'erf', 'erfc', 'Heaviside',
+    'Rational',
+})
+
+# Small integer matrices never need SymPy, so it is only imported for the general path
+sympy = None
+DomainMatrix = None
+symengine = None
+
+
+def require_sympy():
+    """Import SymPy, and SymEngine when it is installed, on first use and return SymPy."""
+    global sympy, DomainMatrix, symengine
+    if sympy is None:
+        try:
+            import sympy as sympy_module
+            from sympy.polys.matrices import DomainMatrix as domain_matrix_class
+        except ImportError:
+            raise ValueError("SymPy is not installed. Please install it using: pip install sympy")
+        try:
+            import symengine as symengine_module
+        except ImportError:
+            symengine_module = None
+        DomainMatrix = domain_matrix_class
+        symengine = symengine_module
+        sympy = sympy_module
+    return sympy
+
+
+@functools.lru_cache(maxsize=256, typed=True)
+def simplify_entry(entry):
+    """
+    Simplify a single matrix entry, memoizing repeated entries.
+
+    Atoms (numbers, constants such as pi, and bare symbols) are already in
+    simplest form, so they skip sympy.simplify() and its expression-tree
+    traversals. Compound numeric expressions still go through simplify(),
+    which can legitimately rewrite them.
+    """
+    if entry.is_Atom:
+        return entry
+    return sympy.simplify(entry)
+
+
+def integer_inverse(rows):
+    """
+    Invert a 2×2 or 3×3 integer matrix from its closed-form adjugate.
+
+    The cofactors are a handful of int multiplications and the entries are
+    exact Fractions, so no SymPy objects are created.
+
+    Args:
+        rows: 2×2 or 3×3 list of ints
+
+    Returns:
+        Tuple of (determinant, inverse rows), where the inverse is None for
+        a singular matrix
+    """
+    if len(rows) == 2:
+        (a, b), (c, d) = rows
+        det = a * d - b * c
+        adjugate = [[d, -b], [-c, a]]
+    else:
+        (a, b, c), (d, e, f), (g, h, i) = rows
+        adjugate = [[e * i - f * h, c * h - b * i, b * f - c * e],
+                    [f * g - d * i, a * i - c * g, c * d - a * f],
+                    [d * h - e * g, b * g - a * h, a * e - b * d]]
+        det = a * adjugate[0][0] + b * adjugate[1][0] + c * adjugate[2][0]
+
+    if det == 0:
+        return 0, None
+    return det, [[Fraction(value, det) for value in row] for row in adjugate]
+
+
+def rational_inverse(matrix):
+    """
+    Invert an integer or rational matrix exactly.
+
+    SymEngine's C++ elimination is used when it is installed, otherwise the
+    matrix is inverted as a DomainMatrix over the field QQ. Either way the
+    generic Expr arithmetic of Matrix.inv() is avoided.
+
+    Args:
+        matrix: Square SymPy matrix with Integer/Rational entries
+
+    Returns:
+        Tuple of (determinant, inverse), where the inverse is None for a
+        singular matrix
+    """
+    # SymEngine crashes on an empty matrix, so the 0×0 case stays in SymPy
+    if symengine is not None and matrix.rows:
+        engine_matrix = symengine.Matrix(matrix.tolist())
+        det = sympy.sympify(engine_matrix.det())
+        if det == 0:
+            return det, None
+        return det, sympy.Matrix(engine_matrix.inv().tolist())
+
+    domain_matrix = DomainMatrix.from_Matrix(matrix).to_field()
+    det = domain_matrix.domain.to_sympy(domain_matrix.det())
+    if det == 0:
+        return det, None
+    return det, domain_matrix.inv().to_Matrix()
+
+
+def choose_inverse_method(matrix):
+    """
+    Pick the inversion algorithm for a matrix that is not over ZZ/QQ.
+
+    Gaussian elimination on symbolic entries swells intermediate
+    expressions, so small or mostly non-zero symbolic matrices are inverted
+    through the adjugate instead. Sparse symbolic matrices stay on GE,
+    whose results simplify faster, and floats stay on GE because the other
+    methods round differently.
+
+    Args:
+        matrix: Square SymPy matrix
+
+    Returns:
+        Method name accepted by Matrix.inv
+    """
+    if not matrix.free_symbols:
+        return 'GE'
+    if matrix.rows <= 4 or 3 * len(matrix.values()) >= 2 * len(matrix):
+        return 'ADJ'
+    return 'GE'
+
+
+def literal_value(node):
+    """
+    Evaluate a syntax tree built only from numeric literals and arithmetic.
+
+    Returns:
+        The numeric value, or None if the tree involves names, calls or tuples
+    """
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.UnaryOp):
+        operand = literal_value(node.operand)
+        if operand is None:
+            return None
+        return -operand if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.BinOp) and type(node.op) in EXPONENT_OPERATORS:
+        left = literal_value(node.left)
+        right = literal_value(node.right)
+        if left is None or right is None:
+            return None
+        return EXPONENT_OPERATORS[type(node.op)](left, right)
+    return None
+
+
+def check_exponent(exponent):
+    """
+    Reject a numeric exponent that SymPy could not evaluate in reasonable time.
+
+    Exponents that mention a name (x**n, 2**x, x**pi) stay symbolic and are
+    left alone. A numeric exponent may not contain a power itself and its
+    value must not exceed MAX_NUMERIC_EXPONENT.
+
+    Raises:
+        ValueError: If the exponent is too large to evaluate
+    """
+    nodes = list(ast.walk(exponent))
+    if any(isinstance(node, ast.Name) for node in nodes):
+        return
+
+    error = ValueError("Invalid expression: numeric exponent is too large to evaluate")
+    if any(isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow) for node in nodes):
+        raise error
+
+    try:
+        value = literal_value(exponent)
+    except ZeroDivisionError:
+        # SymPy reports this itself (as zoo or nan)
+        return
+    except OverflowError:
+        raise error
+    if value is not None and abs(value) > MAX_NUMERIC_EXPONENT:
+        raise error
+
+
+def validate_cell_text(text):
+    """
+    Check that a matrix entry given as text is plain math before sympify sees it.
+
+    Applies the forbidden-pattern scan and character whitelist, then parses
+    the text (reading ^ as **, like SymPy) and accepts only arithmetic,
+    numeric literals, calls to ALLOWED_FUNCTIONS and bounded numeric
+    exponents. Text that is not valid Python is left for sympify to reject.
+
+    Args:
+        text: Matrix entry string
+
+    Raises:
+        ValueError: If the entry is not a safe expression
+    """
+    match = DANGEROUS_PATTERN_RE.search(''.join(text.split()).lower())
+    if match:
+        raise ValueError(f"Invalid expression: contains forbidden pattern '{match.group(0)}'")
+
+    if not ALLOWED_EXPRESSION_RE.match(text):
+        raise ValueError("Invalid expression: contains forbidden characters")
+
+    try:
+        tree = ast.parse(text.strip().replace('^', '**'), mode='eval')
+    except SyntaxError:
+        return
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_AST_NODES):
+            raise ValueError(f"Invalid expression: {type(node).__name__} syntax is not allowed")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, complex)):
+            raise ValueError("Invalid expression: only numeric literals are allowed")
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            check_exponent(node.right)
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name):
+                raise ValueError("Invalid expression: only calls to named functions are allowed")
+            if node.func.id not in ALLOWED_FUNCTIONS and len(node.func.id) != 1:
+                raise ValueError(f"Invalid expression: unsupported function '{node.func.id}'")
+
+
+def validate_entries(matrix_data, label='matrix'):
+    """
+    Check every entry before SymPy converts the matrix.
+
+    Numbers pass as they are; strings must pass validate_cell_text().
+
+    Args:
+        matrix_data: 2D list representing the matrix
+        label: Name used for the matrix in error messages
+
+    Raises:
+        ValueError: Naming the row and column of the first invalid entry
+    """
+    for i, row in enumerate(matrix_data, 1):
+        for j, value in enumerate(row, 1):
+            value_type = type(value)
+            if value_type is int or value_type is float:
+                continue
+            try:
+                if value_type is not str:
+                    raise ValueError("entries must be numbers or expression strings")
+                validate_cell_text(value)
+            except ValueError as e:
+                raise ValueError(f"Invalid {label} entry at row {i}, column {j}: {e}")
+
+
+def matrix_key(matrix_data):
+    """
+    Build a hashable cache key for a list-of-lists matrix.
+
+    Entries are paired with their types so 1, 1.0 and True stay distinct.
+
+    Returns:
+        Tuple of row tuples, or None if the input is not a list of lists of
+        hashable values
+    """
+    if not isinstance(matrix_data, list) or not all(isinstance(row, list) for row in matrix_data):
+        return None
+    key = tuple(tuple((type(value), value) for value in row) for row in matrix_data)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def rows_from_key(key):
+    """Rebuild the list-of-lists matrix described by a matrix_key()."""
+    return [[value for _, value in row] for row in key]
 
 
 def compute_inverse(matrix_data):
@@ -27,29 +369,60 @@ def compute_inverse(matrix_data):
         if not matrix_data or not isinstance(matrix_data, list):
             raise ValueError("Matrix must be a 2D array (list of lists)")
 
-        if not all(isinstance(row, list) for row in matrix_data):
-            raise ValueError("Matrix must be a 2D array (each row must be a list)")
+        # Check that every row is a list and all rows have the same length in
+        # one pass, still reporting a non-list row before a length mismatch
+        row_length = len(matrix_data[0]) if isinstance(matrix_data[0], list) else None
+        same_length = True
+        for row in matrix_data:
+            if not isinstance(row, list):
+                raise ValueError("Matrix must be a 2D array (each row must be a list)")
+            if len(row) != row_length:
+                same_length = False
+        if not same_length:
+            raise ValueError("All rows must have the same length")
+
+        # Size limit for performance, checked before SymPy allocates any entries
+        size = len(matrix_data)
+        if size > 10 or len(matrix_data[0]) > 10:
+            raise ValueError("Matrix size limited to 10×10 for performance reasons")
 
-        # Check that all rows have the same length
-        if len(matrix_data) > 0:
-            row_length = len(matrix_data[0])
-            if not all(len(row) == row_length for row in matrix_data):
-                raise ValueError("All rows must have the same length")
+        # Small integer matrices have an exact inverse without going through SymPy
+        if size in (2, 3) and len(matrix_data[0]) == size and \
+                all(type(value) is int for row in matrix_data for value in row):
+            det, inverse = integer_inverse(matrix_data)
+            if inverse is None:
+                return {
+                    "success": False,
+                    "error": "Matrix is singular (determinant is zero) and cannot be inverted",
+                    "matrix_size": f"{size}×{size}",
+                    "determinant": "0"
+                }
+            return {
+                "success": True,
+                "inverse": [[str(value) for value in row] for row in inverse],
+                "matrix_size": f"{size}×{size}",
+                "determinant": str(det)
+            }
 
         # Create SymPy matrix
+        validate_entries(matrix_data)
+        require_sympy()
         matrix = sympy.Matrix(matrix_data)
 
         # Check if matrix is square (required for inverse)
         if matrix.rows != matrix.cols:
             raise ValueError(f"Matrix must be square to compute inverse (got {matrix.rows}×{matrix.cols})")
 
-        # Size limit for performance
-        if matrix.rows > 10:
-            raise ValueError("Matrix size limited to 10×10 for performance reasons")
+        # Integer/rational matrices have an exact fast path
+        if all(entry.is_Rational for entry in matrix):
+            det, inverse = rational_inverse(matrix)
+        else:
+            # Berkowitz gives the determinant the adjugate method divides by
+            det, inverse = matrix.det(method='berkowitz'), None
 
         # Check if matrix is invertible (determinant != 0)
-        det = matrix.det()
-        if det == 0:
+        simplified_det = simplify_entry(det)
+        if simplified_det == 0:
             return {
                 "success": False,
                 "error": "Matrix is singular (determinant is zero) and cannot be inverted",
@@ -58,17 +431,22 @@ def compute_inverse(matrix_data):
             }
 
         # Compute inverse
-        inverse = matrix.inv()
+        if inverse is None:
+            method = choose_inverse_method(matrix)
+            if method == 'ADJ':
+                # Reuse the determinant rather than letting inv() recompute it
+                inverse = matrix.adjugate() / det
+            else:
+                inverse = matrix.inv(method=method)
 
         # Convert result to list format with simplified entries
-        result_matrix = [[str(sympy.simplify(inverse[i, j])) for j in range(inverse.cols)]
-                        for i in range(inverse.rows)]
+        result_matrix = [[str(simplify_entry(entry)) for entry in row] for row in inverse.tolist()]
 
         return {
             "success": True,
             "inverse": result_matrix,
             "matrix_size": f"{matrix.rows}×{matrix.cols}",
-            "determinant": str(sympy.simplify(det))
+            "determinant": str(simplified_det)
         }
 
     except ValueError as e:
@@ -83,43 +461,105 @@ def compute_inverse(matrix_data):
         }
 
 
-def main():
-    try:
-        # Read input from stdin
-        input_data = json.load(sys.stdin)
+@functools.lru_cache(maxsize=128)
+def cached_inverse(key):
+    """Memoized compute_inverse for a matrix_key(), kept as JSON bytes so every hit gets a fresh copy."""
+    return json.dumps(compute_inverse(rows_from_key(key))).encode('utf-8')
+
+
+def handle_request(input_data):
+    """
+    Validate tool arguments and compute the matrix inverse.
 
-        matrix = input_data.get('matrix')
+    Args:
+        input_data: Dictionary of tool arguments
+
+    Returns:
+        Dictionary containing success status and inverse or error
+    """
+    matrix = input_data.get('matrix')
+
+    # Validate inputs
+    if matrix is None:
+        return {
+            "success": False,
+            "error": "Missing required parameter 'matrix'"
+        }
 
-        # Validate inputs
-        if matrix is None:
-            print(json.dumps({
+    # Compute inverse, reusing the result for a matrix seen before
+    key = matrix_key(matrix)
+    return loads(cached_inverse(key)) if key is not None else compute_inverse(matrix)
+
+
+def serve():
+    """
+    Answer newline-delimited JSON requests from stdin until EOF.
+
+    Each input line is one request and each response is written as one line.
+    Keeping the process alive amortizes the SymPy import and reuses
+    memoized inverses across requests.
+    """
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+
+        if len(line) > MAX_INPUT_BYTES:
+            emit(INPUT_TOO_LARGE_ERROR)
+            sys.stdout.buffer.flush()
+            continue
+
+        try:
+            result = handle_request(loads(line))
+        except json.JSONDecodeError as e:
+            result = {
+                "success": False,
+                "error": f"Invalid JSON input: {str(e)}"
+            }
+        except Exception as e:
+            result = {
                 "success": False,
-                "error": "Missing required parameter 'matrix'"
-            }))
+                "error": f"Unexpected error: {str(e)}"
+            }
+
+        emit(result)
+        sys.stdout.buffer.flush()
+
+
+def main():
+    if '--server' in sys.argv[1:]:
+        serve()
+        return
+
+    try:
+        # Read input from stdin, stopping as soon as it is over the limit
+        data = sys.stdin.buffer.read(MAX_INPUT_BYTES + 1)
+        if len(data) > MAX_INPUT_BYTES:
+            emit(INPUT_TOO_LARGE_ERROR)
             sys.exit(1)
+        input_data = loads(data)
 
         # Compute inverse
-        result = compute_inverse(matrix)
+        result = handle_request(input_data)
 
         # Return result
-        print(json.dumps(result))
+        emit(result)
 
         # Exit with error code if computation failed
         if not result.get("success", False):
             sys.exit(1)
 
     except json.JSONDecodeError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Invalid JSON input: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
     except Exception as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Unexpected error: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
 
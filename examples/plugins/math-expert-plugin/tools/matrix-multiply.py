@@ -1,15 +1,264 @@
 #!/usr/bin/env python3
+import ast
 import json
 import sys
+import re
+import operator
+import functools
 
 try:
-    import sympy
+    import orjson
 except ImportError:
-    print(json.dumps({
-        "success": False,
-        "error": "SymPy is not installed. Please install it using: pip install sympy"
-    }))
-    sys.exit(1)
+    orjson = None
+
+# A run of 19+ digits may be an integer outside orjson's 64-bit range
+LONG_INTEGER_RE = re.compile(rb'\d{19}')
+
+# Requests larger than this are answered with an error before any parsing
+MAX_INPUT_BYTES = 64 * 1024
+INPUT_TOO_LARGE_ERROR = {
+    "success": False,
+    "error": f"Input too large (limit is {MAX_INPUT_BYTES} bytes)"
+}
+
+
+def loads(data):
+    """Parse JSON input, using orjson when it is installed."""
+    # orjson reads integers wider than 64 bits as floats, so leave those to json
+    if orjson is not None and not LONG_INTEGER_RE.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def emit(response):
+    """Write a JSON response line straight to the stdout buffer."""
+    if orjson is not None:
+        try:
+            sys.stdout.buffer.write(orjson.dumps(response, option=orjson.OPT_APPEND_NEWLINE))
+            return
+        except TypeError:
+            # orjson only handles 64-bit integers; let json encode bignums
+            pass
+    sys.stdout.buffer.write(json.dumps(response).encode('utf-8') + b"\n")
+
+
+# Entries given as text are parsed by sympify, which evaluates Python, so
+# they are held to the same checks as the expression tools
+DANGEROUS_PATTERNS = [
+    '__', 'import', 'exec', 'eval', 'compile', 'open', 'file',
+    'input', 'raw_input', 'globals', 'locals', 'vars', 'dir',
+    'getattr', 'setattr', 'delattr', 'hasattr', 'callable',
+    'classmethod', 'staticmethod', 'property', 'lambda'
+]
+DANGEROUS_PATTERN_RE = re.compile('|'.join(map(re.escape, DANGEROUS_PATTERNS)))
+
+ALLOWED_EXPRESSION_RE = re.compile(r'^[a-zA-Z0-9\+\-\*/\(\)\.\,\s\^\%]+$')
+
+# SymPy evaluates numeric powers while parsing, so a power tower such as
+# 9**9**9 or a huge literal exponent never returns. Numeric exponents above
+# this bound are rejected.
+MAX_NUMERIC_EXPONENT = 10000
+
+# Arithmetic a literal-only exponent is evaluated with to compare it to the bound
+EXPONENT_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+}
+
+# Syntax tree nodes an arithmetic expression may contain
+ALLOWED_AST_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load,
+    ast.Constant, ast.Tuple, ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.FloorDiv, ast.Mod, ast.Pow, ast.BitXor, ast.UAdd, ast.USub
+)
+
+# Functions an expression may call. Single-letter names are also allowed,
+# since SymPy treats them as undefined functions (e.g. f(x)).
+ALLOWED_FUNCTIONS = frozenset({
+    'sin', 'cos', 'tan', 'cot', 'sec', 'csc',
+    'asin', 'acos', 'atan', 'acot', 'asec', 'acsc', 'atan2',
+    'sinh', 'cosh', 'tanh', 'coth', 'sech', 'csch',
+    'asinh', 'acosh', 'atanh', 'acoth',
+    'exp', 'log', 'ln', 'sqrt', 'cbrt', 'root',
+    'abs', 'Abs', 'sign', 'floor', 'ceiling', 'Min', 'Max', 're', 'im',
+    'factorial', 'binomial', 'gamma', 'erf', 'erfc', 'Heaviside',
+    'Rational',
+})
+
+# SymPy is imported on first use so rejected input never pays for the import
+sympy = None
+
+
+def require_sympy():
+    """Import SymPy on first use and return the module."""
+    global sympy
+    if sympy is None:
+        try:
+            import sympy as sympy_module
+        except ImportError:
+            raise ValueError("SymPy is not installed. Please install it using: pip install sympy")
+        sympy = sympy_module
+    return sympy
+
+
+@functools.lru_cache(maxsize=256, typed=True)
+def simplify_entry(entry):
+    """
+    Simplify a single matrix entry, memoizing repeated entries.
+
+    Atoms (numbers, constants such as pi, and bare symbols) are already in
+    simplest form, so they skip sympy.simplify() and its expression-tree
+    traversals. Compound numeric expressions still go through simplify(),
+    which can legitimately rewrite them.
+    """
+    if entry.is_Atom:
+        return entry
+    return sympy.simplify(entry)
+
+
+def literal_value(node):
+    """
+    Evaluate a syntax tree built only from numeric literals and arithmetic.
+
+    Returns:
+        The numeric value, or None if the tree involves names, calls or tuples
+    """
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.UnaryOp):
+        operand = literal_value(node.operand)
+        if operand is None:
+            return None
+        return -operand if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.BinOp) and type(node.op) in EXPONENT_OPERATORS:
+        left = literal_value(node.left)
+        right = literal_value(node.right)
+        if left is None or right is None:
+            return None
+        return EXPONENT_OPERATORS[type(node.op)](left, right)
+    return None
+
+
+def check_exponent(exponent):
+    """
+    Reject a numeric exponent that SymPy could not evaluate in reasonable time.
+
+    Exponents that mention a name (x**n, 2**x, x**pi) stay symbolic and are
+    left alone. A numeric exponent may not contain a power itself and its
+    value must not exceed MAX_NUMERIC_EXPONENT.
+
+    Raises:
+        ValueError: If the exponent is too large to evaluate
+    """
+    nodes = list(ast.walk(exponent))
+    if any(isinstance(node, ast.Name) for node in nodes):
+        return
+
+    error = ValueError("Invalid expression: numeric exponent is too large to evaluate")
+    if any(isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow) for node in nodes):
+        raise error
+
+    try:
+        value = literal_value(exponent)
+    except ZeroDivisionError:
+        # SymPy reports this itself (as zoo or nan)
+        return
+    except OverflowError:
+        raise error
+    if value is not None and abs(value) > MAX_NUMERIC_EXPONENT:
+        raise error
+
+
+def validate_cell_text(text):
+    """
+    Check that a matrix entry given as text is plain math before sympify sees it.
+
+    Applies the forbidden-pattern scan and character whitelist, then parses
+    the text (reading ^ as **, like SymPy) and accepts only arithmetic,
+    numeric literals, calls to ALLOWED_FUNCTIONS and bounded numeric
+    exponents. Text that is not valid Python is left for sympify to reject.
+
+    Args:
+        text: Matrix entry string
+
+    Raises:
+        ValueError: If the entry is not a safe expression
+    """
+    match = DANGEROUS_PATTERN_RE.search(''.join(text.split()).lower())
+    if match:
+        raise ValueError(f"Invalid expression: contains forbidden pattern '{match.group(0)}'")
+
+    if not ALLOWED_EXPRESSION_RE.match(text):
+        raise ValueError("Invalid expression: contains forbidden characters")
+
+    try:
+        tree = ast.parse(text.strip().replace('^', '**'), mode='eval')
+    except SyntaxError:
+        return
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_AST_NODES):
+            raise ValueError(f"Invalid expression: {type(node).__name__} syntax is not allowed")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, complex)):
+            raise ValueError("Invalid expression: only numeric literals are allowed")
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            check_exponent(node.right)
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name):
+                raise ValueError("Invalid expression: only calls to named functions are allowed")
+            if node.func.id not in ALLOWED_FUNCTIONS and len(node.func.id) != 1:
+                raise ValueError(f"Invalid expression: unsupported function '{node.func.id}'")
+
+
+def validate_entries(matrix_data, label='matrix'):
+    """
+    Check every entry before SymPy converts the matrix.
+
+    Numbers pass as they are; strings must pass validate_cell_text().
+
+    Args:
+        matrix_data: 2D list representing the matrix
+        label: Name used for the matrix in error messages
+
+    Raises:
+        ValueError: Naming the row and column of the first invalid entry
+    """
+    for i, row in enumerate(matrix_data, 1):
+        for j, value in enumerate(row, 1):
+            value_type = type(value)
+            if value_type is int or value_type is float:
+                continue
+            try:
+                if value_type is not str:
+                    raise ValueError("entries must be numbers or expression strings")
+                validate_cell_text(value)
+            except ValueError as e:
+                raise ValueError(f"Invalid {label} entry at row {i}, column {j}: {e}")
+
+
+def matrix_key(matrix_data):
+    """
+    Build a hashable cache key for a list-of-lists matrix.
+
+    Entries are paired with their types so 1, 1.0 and True stay distinct.
+
+    Returns:
+        Tuple of row tuples, or None if the input is not a list of lists of
+        hashable values
+    """
+    if not isinstance(matrix_data, list) or not all(isinstance(row, list) for row in matrix_data):
+        return None
+    key = tuple(tuple((type(value), value) for value in row) for row in matrix_data)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def rows_from_key(key):
+    """Rebuild the list-of-lists matrix described by a matrix_key()."""
+    return [[value for _, value in row] for row in key]
 
 
 def multiply_matrices(matrix_a_data, matrix_b_data):
@@ -37,14 +286,18 @@ def multiply_matrices(matrix_a_data, matrix_b_data):
         if not all(isinstance(row, list) for row in matrix_b_data):
             raise ValueError("matrix_b must be a 2D array (each row must be a list)")
 
+        # Size limit for performance, checked before SymPy allocates any entries
+        if len(matrix_a_data) > 10 or len(matrix_a_data[0]) > 10 or \
+                len(matrix_b_data) > 10 or len(matrix_b_data[0]) > 10:
+            raise ValueError("Matrix dimensions limited to 10×10 for performance reasons")
+
         # Create SymPy matrices
+        validate_entries(matrix_a_data, 'matrix_a')
+        validate_entries(matrix_b_data, 'matrix_b')
+        require_sympy()
         matrix_a = sympy.Matrix(matrix_a_data)
         matrix_b = sympy.Matrix(matrix_b_data)
 
-        # Size limit for performance
-        if matrix_a.rows > 10 or matrix_a.cols > 10 or matrix_b.rows > 10 or matrix_b.cols > 10:
-            raise ValueError("Matrix dimensions limited to 10×10 for performance reasons")
-
         # Check dimension compatibility for multiplication
         if matrix_a.cols != matrix_b.rows:
             raise ValueError(
@@ -56,8 +309,7 @@ def multiply_matrices(matrix_a_data, matrix_b_data):
         product = matrix_a * matrix_b
 
         # Convert result to list format
-        result_matrix = [[str(sympy.simplify(product[i, j])) for j in range(product.cols)]
-                        for i in range(product.rows)]
+        result_matrix = [[str(simplify_entry(entry)) for entry in row] for row in product.tolist()]
 
         return {
             "success": True,
@@ -79,51 +331,115 @@ def multiply_matrices(matrix_a_data, matrix_b_data):
         }
 
 
-def main():
-    try:
-        # Read input from stdin
-        input_data = json.load(sys.stdin)
+@functools.lru_cache(maxsize=128)
+def cached_product(key_a, key_b):
+    """Memoized multiply_matrices for two matrix_key()s, kept as JSON bytes so every hit gets a fresh copy."""
+    return json.dumps(multiply_matrices(rows_from_key(key_a), rows_from_key(key_b))).encode('utf-8')
 
-        matrix_a = input_data.get('matrix_a')
-        matrix_b = input_data.get('matrix_b')
 
-        # Validate inputs
-        if matrix_a is None:
-            print(json.dumps({
-                "success": False,
-                "error": "Missing required parameter 'matrix_a'"
-            }))
-            sys.exit(1)
+def handle_request(input_data):
+    """
+    Validate tool arguments and multiply the two matrices.
+
+    Args:
+        input_data: Dictionary of tool arguments
 
-        if matrix_b is None:
-            print(json.dumps({
+    Returns:
+        Dictionary containing success status and product matrix or error
+    """
+    matrix_a = input_data.get('matrix_a')
+    matrix_b = input_data.get('matrix_b')
+
+    # Validate inputs
+    if matrix_a is None:
+        return {
+            "success": False,
+            "error": "Missing required parameter 'matrix_a'"
+        }
+
+    if matrix_b is None:
+        return {
+            "success": False,
+            "error": "Missing required parameter 'matrix_b'"
+        }
+
+    # Multiply matrices, reusing the result for a pair seen before
+    key_a = matrix_key(matrix_a)
+    key_b = matrix_key(matrix_b)
+    if key_a is not None and key_b is not None:
+        return loads(cached_product(key_a, key_b))
+    return multiply_matrices(matrix_a, matrix_b)
+
+
+def serve():
+    """
+    Answer newline-delimited JSON requests from stdin until EOF.
+
+    Each input line is one request and each response is written as one line.
+    Keeping the process alive amortizes the SymPy import and reuses
+    memoized products across requests.
+    """
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+
+        if len(line) > MAX_INPUT_BYTES:
+            emit(INPUT_TOO_LARGE_ERROR)
+            sys.stdout.buffer.flush()
+            continue
+
+        try:
+            result = handle_request(loads(line))
+        except json.JSONDecodeError as e:
+            result = {
+                "success": False,
+                "error": f"Invalid JSON input: {str(e)}"
+            }
+        except Exception as e:
+            result = {
                 "success": False,
-                "error": "Missing required parameter 'matrix_b'"
-            }))
+                "error": f"Unexpected error: {str(e)}"
+            }
+
+        emit(result)
+        sys.stdout.buffer.flush()
+
+
+def main():
+    if '--server' in sys.argv[1:]:
+        serve()
+        return
+
+    try:
+        # Read input from stdin, stopping as soon as it is over the limit
+        data = sys.stdin.buffer.read(MAX_INPUT_BYTES + 1)
+        if len(data) > MAX_INPUT_BYTES:
+            emit(INPUT_TOO_LARGE_ERROR)
             sys.exit(1)
+        input_data = loads(data)
 
         # Multiply matrices
-        result = multiply_matrices(matrix_a, matrix_b)
+        result = handle_request(input_data)
 
         # Return result
-        print(json.dumps(result))
+        emit(result)
 
         # Exit with error code if computation failed
         if not result.get("success", False):
             sys.exit(1)
 
     except json.JSONDecodeError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Invalid JSON input: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
     except Exception as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Unexpected error: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
 
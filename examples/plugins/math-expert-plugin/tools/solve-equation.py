@@ -1,16 +1,106 @@
 #!/usr/bin/env python3
+import ast
 import json
 import sys
 import re
+import string
+import functools
+import operator
 
 try:
-    import sympy
+    import orjson
 except ImportError:
-    print(json.dumps({
-        "success": False,
-        "error": "SymPy is not installed. Please install it using: pip install sympy"
-    }))
-    sys.exit(1)
+    orjson = None
+
+# A run of 19+ digits may be an integer outside orjson's 64-bit range
+LONG_INTEGER_RE = re.compile(rb'\d{19}')
+
+# Requests larger than this are answered with an error before any parsing
+MAX_INPUT_BYTES = 64 * 1024
+INPUT_TOO_LARGE_ERROR = {
+    "success": False,
+    "error": f"Input too large (limit is {MAX_INPUT_BYTES} bytes)"
+}
+
+
+def loads(data):
+    """Parse JSON input, using orjson when it is installed."""
+    # orjson reads integers wider than 64 bits as floats, so leave those to json
+    if orjson is not None and not LONG_INTEGER_RE.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def emit(response):
+    """Write a JSON response line straight to the stdout buffer."""
+    if orjson is not None:
+        try:
+            sys.stdout.buffer.write(orjson.dumps(response, option=orjson.OPT_APPEND_NEWLINE))
+            return
+        except TypeError:
+            # orjson only handles 64-bit integers; let json encode bignums
+            pass
+    sys.stdout.buffer.write(json.dumps(response).encode('utf-8') + b"\n")
+
+
+# SymPy is imported once both sides pass validation, so rejected input returns quickly
+sympy = None
+
+
+def require_sympy():
+    """Import SymPy on first use and return the module."""
+    global sympy
+    if sympy is None:
+        try:
+            import sympy as sympy_module
+        except ImportError:
+            raise ValueError("SymPy is not installed. Please install it using: pip install sympy")
+        sympy = sympy_module
+    return sympy
+
+
+DANGEROUS_PATTERNS = [
+    '__', 'import', 'exec', 'eval', 'compile', 'open', 'file',
+    'input', 'raw_input', 'globals', 'locals', 'vars', 'dir',
+    'getattr', 'setattr', 'delattr', 'hasattr', 'callable',
+    'classmethod', 'staticmethod', 'property', 'lambda'
+]
+DANGEROUS_PATTERN_RE = re.compile('|'.join(map(re.escape, DANGEROUS_PATTERNS)))
+# Every forbidden pattern contains a letter or an underscore
+PATTERN_CHARS_TABLE = str.maketrans('', '', string.ascii_letters + '_')
+
+ALLOWED_EXPRESSION_RE = re.compile(r'^[a-zA-Z0-9\+\-\*/\(\)\.\,\s\^\%]+$')
+
+# SymPy evaluates numeric powers while parsing, so a power tower such as
+# 9**9**9 or a huge literal exponent never returns. Numeric exponents above
+# this bound are rejected.
+MAX_NUMERIC_EXPONENT = 10000
+
+# Arithmetic a literal-only exponent is evaluated with to compare it to the bound
+EXPONENT_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+}
+
+# Syntax tree nodes an arithmetic expression may contain
+ALLOWED_AST_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load,
+    ast.Constant, ast.Tuple, ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.FloorDiv, ast.Mod, ast.Pow, ast.BitXor, ast.UAdd, ast.USub
+)
+
+# Functions an expression may call. Single-letter names are also allowed,
+# since SymPy treats them as undefined functions (e.g. f(x)).
+ALLOWED_FUNCTIONS = frozenset({
+    'sin', 'cos', 'tan', 'cot', 'sec', 'csc',
+    'asin', 'acos', 'atan', 'acot', 'asec', 'acsc', 'atan2',
+    'sinh', 'cosh', 'tanh', 'coth', 'sech', 'csch',
+    'asinh', 'acosh', 'atanh', 'acoth',
+    'exp', 'log', 'ln', 'sqrt', 'cbrt', 'root',
+    'abs', 'Abs', 'sign', 'floor', 'ceiling', 'Min', 'Max', 're', 'im',
+    'factorial', 'binomial', 'gamma', 'erf', 'erfc', 'Heaviside',
+    'Rational', 'Derivative',
+})
 
 
 def validate_expression(expr_str):
@@ -25,29 +115,128 @@ def validate_expression(expr_str):
     Raises:
         ValueError: If expression contains dangerous patterns
     """
-    # Remove whitespace for checking
-    check_str = expr_str.replace(' ', '')
+    # Remove all whitespace and lowercase once for checking
+    check_str = ''.join(expr_str.split()).lower()
 
-    # Block common code execution patterns
-    dangerous_patterns = [
-        '__', 'import', 'exec', 'eval', 'compile', 'open', 'file',
-        'input', 'raw_input', 'globals', 'locals', 'vars', 'dir',
-        'getattr', 'setattr', 'delattr', 'hasattr', 'callable',
-        'classmethod', 'staticmethod', 'property', 'lambda'
-    ]
-
-    for pattern in dangerous_patterns:
-        if pattern in check_str.lower():
-            raise ValueError(f"Invalid expression: contains forbidden pattern '{pattern}'")
+    # Block common code execution patterns. Input without letters or
+    # underscores (such as "7" or "2*3+1") cannot contain any of them
+    if expr_str.translate(PATTERN_CHARS_TABLE) != expr_str:
+        match = DANGEROUS_PATTERN_RE.search(check_str)
+        if match:
+            raise ValueError(f"Invalid expression: contains forbidden pattern '{match.group(0)}'")
 
     # Allow only: letters, numbers, basic operators, parentheses, and common math functions
     # This regex allows: a-z, A-Z, 0-9, +, -, *, /, **, //, %, ^, (), ., ,, spaces
     # Plus common function names: sin, cos, tan, log, exp, sqrt, abs, etc.
-    allowed_pattern = r'^[a-zA-Z0-9\+\-\*/\(\)\.\,\s\^\%]+$'
-    if not re.match(allowed_pattern, expr_str):
+    if not ALLOWED_EXPRESSION_RE.match(expr_str):
         raise ValueError("Invalid expression: contains forbidden characters")
 
 
+def literal_value(node):
+    """
+    Evaluate a syntax tree built only from numeric literals and arithmetic.
+
+    Returns:
+        The numeric value, or None if the tree involves names, calls or tuples
+    """
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.UnaryOp):
+        operand = literal_value(node.operand)
+        if operand is None:
+            return None
+        return -operand if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.BinOp) and type(node.op) in EXPONENT_OPERATORS:
+        left = literal_value(node.left)
+        right = literal_value(node.right)
+        if left is None or right is None:
+            return None
+        return EXPONENT_OPERATORS[type(node.op)](left, right)
+    return None
+
+
+def check_exponent(exponent):
+    """
+    Reject a numeric exponent that SymPy could not evaluate in reasonable time.
+
+    Exponents that mention a name (x**n, 2**x, x**pi) stay symbolic and are
+    left alone. A numeric exponent may not contain a power itself and its
+    value must not exceed MAX_NUMERIC_EXPONENT.
+
+    Raises:
+        ValueError: If the exponent is too large to evaluate
+    """
+    nodes = list(ast.walk(exponent))
+    if any(isinstance(node, ast.Name) for node in nodes):
+        return
+
+    error = ValueError("Invalid expression: numeric exponent is too large to evaluate")
+    if any(isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow) for node in nodes):
+        raise error
+
+    try:
+        value = literal_value(exponent)
+    except ZeroDivisionError:
+        # SymPy reports this itself (as zoo or nan)
+        return
+    except OverflowError:
+        raise error
+    if value is not None and abs(value) > MAX_NUMERIC_EXPONENT:
+        raise error
+
+
+def validate_structure(expr_str):
+    """
+    Check that an expression parses to plain arithmetic and function calls.
+
+    The character whitelist still lets through Python constructs such as
+    attribute access (x.subs(...)), conditional expressions and generator
+    expressions, all of which sympify would evaluate. Calls are limited to
+    ALLOWED_FUNCTIONS, since names like preview() or plot() reach outside
+    SymPy, and numeric exponents are bounded by check_exponent() because
+    SymPy evaluates them while parsing. Text that is not valid Python is left
+    for sympify to reject with its own error.
+
+    Args:
+        expr_str: Expression string to validate
+
+    Raises:
+        ValueError: If the expression contains a disallowed construct
+    """
+    try:
+        # SymPy reads ^ as ** (right-associative, binding tighter than *),
+        # so parse it that way rather than as Python's bitwise xor
+        tree = ast.parse(expr_str.strip().replace('^', '**'), mode='eval')
+    except SyntaxError:
+        return
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_AST_NODES):
+            raise ValueError(f"Invalid expression: {type(node).__name__} syntax is not allowed")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, complex)):
+            raise ValueError("Invalid expression: only numeric literals are allowed")
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            check_exponent(node.right)
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name):
+                raise ValueError("Invalid expression: only calls to named functions are allowed")
+            if node.func.id not in ALLOWED_FUNCTIONS and len(node.func.id) != 1:
+                raise ValueError(f"Invalid expression: unsupported function '{node.func.id}'")
+
+
+def parentheses_balanced(text):
+    """Check that every parenthesis in text is closed, and never before it opens."""
+    depth = 0
+    for char in text:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0
+
+
 def parse_equation(equation_str):
     """
     Parse an equation string into left and right hand sides.
@@ -56,7 +245,7 @@ def parse_equation(equation_str):
         equation_str: String containing the equation (e.g., "2*x + 3 = 7")
 
     Returns:
-        Tuple of (left_expr, right_expr) as SymPy expressions
+        SymPy expression for left - right, whose roots solve the equation
 
     Raises:
         ValueError: If the equation format is invalid
@@ -74,20 +263,24 @@ def parse_equation(equation_str):
         raise ValueError("Both sides of the equation must be non-empty")
 
     # Validate both sides before parsing
-    validate_expression(left_str)
-    validate_expression(right_str)
+    for side in (left_str, right_str):
+        validate_expression(side)
+        validate_structure(side)
 
+    require_sympy()
     try:
         # Use sympify with restricted namespace to prevent code execution
         # Empty locals dict prevents access to global namespace
         safe_locals = {}
-        left_expr = sympy.sympify(left_str, locals=safe_locals)
-        right_expr = sympy.sympify(right_str, locals=safe_locals)
+        if parentheses_balanced(left_str) and parentheses_balanced(right_str):
+            # Both sides go through the parser in one call as left - right
+            return sympy.sympify(f"({left_str}) - ({right_str})", locals=safe_locals)
+        # An unbalanced side must fail on its own instead of pairing up with
+        # parentheses from the other side
+        return sympy.sympify(left_str, locals=safe_locals) - sympy.sympify(right_str, locals=safe_locals)
     except Exception as e:
         raise ValueError(f"Invalid equation syntax: {str(e)}")
 
-    return left_expr, right_expr
-
 
 def format_solution(solution):
     """
@@ -112,6 +305,34 @@ def format_solution(solution):
         return str(solution)
 
 
+def solve_linear(equation, variable):
+    """
+    Solve equation = 0 directly when it is linear in variable.
+
+    Only rational coefficients are handled, where -b/a is exactly what
+    sympy.solve would return; anything else is left to sympy.solve.
+
+    Args:
+        equation: SymPy expression equal to zero
+        variable: SymPy symbol to solve for
+
+    Returns:
+        List with the single solution, or None if the shortcut does not apply
+    """
+    try:
+        poly = sympy.Poly(equation, variable)
+    except sympy.PolynomialError:
+        return None
+
+    if poly.degree() != 1:
+        return None
+
+    slope, intercept = poly.all_coeffs()
+    if not (slope.is_Rational and intercept.is_Rational):
+        return None
+    return [-intercept / slope]
+
+
 def solve_equation_symbolic(equation_str, variable_str='x'):
     """
     Solve an algebraic equation symbolically using SymPy.
@@ -124,17 +345,16 @@ def solve_equation_symbolic(equation_str, variable_str='x'):
         Dictionary containing success status and solutions
     """
     try:
-        # Parse the equation
-        left_expr, right_expr = parse_equation(equation_str)
-
-        # Create the equation as left - right = 0
-        equation = left_expr - right_expr
+        # Parse the equation as left - right = 0
+        equation = parse_equation(equation_str)
 
         # Define the variable
         variable = sympy.Symbol(variable_str)
 
-        # Solve the equation
-        solutions = sympy.solve(equation, variable)
+        # Solve the equation, skipping sympy.solve for rational linear equations
+        solutions = solve_linear(equation, variable)
+        if solutions is None:
+            solutions = sympy.solve(equation, variable)
 
         # Handle different solution types
         if isinstance(solutions, list):
@@ -204,58 +424,117 @@ def solve_equation_symbolic(equation_str, variable_str='x'):
         }
 
 
-def main():
-    try:
-        # Read input from stdin
-        input_data = json.load(sys.stdin)
+@functools.lru_cache(maxsize=128)
+def cached_solution(equation_str, variable_str):
+    """Memoized solve_equation_symbolic, kept as JSON bytes so every hit gets a fresh copy."""
+    return json.dumps(solve_equation_symbolic(equation_str, variable_str)).encode('utf-8')
 
-        equation = input_data.get('equation')
-        variable = input_data.get('variable', 'x')
 
-        # Validate inputs
-        if equation is None:
-            print(json.dumps({
-                "success": False,
-                "error": "Missing required parameter 'equation'"
-            }))
-            sys.exit(1)
+def handle_request(input_data):
+    """
+    Validate tool arguments and solve the equation.
 
-        if not isinstance(equation, str) or not equation.strip():
-            print(json.dumps({
-                "success": False,
-                "error": "Equation must be a non-empty string"
-            }))
-            sys.exit(1)
+    Args:
+        input_data: Dictionary of tool arguments
 
-        if not isinstance(variable, str) or not variable.strip():
-            print(json.dumps({
+    Returns:
+        Dictionary containing success status and solutions or error
+    """
+    equation = input_data.get('equation')
+    variable = input_data.get('variable', 'x')
+
+    # Validate inputs
+    if equation is None:
+        return {
+            "success": False,
+            "error": "Missing required parameter 'equation'"
+        }
+
+    if not isinstance(equation, str) or not equation.strip():
+        return {
+            "success": False,
+            "error": "Equation must be a non-empty string"
+        }
+
+    if not isinstance(variable, str) or not variable.strip():
+        return {
+            "success": False,
+            "error": "Variable must be a non-empty string"
+        }
+
+    # Solve the equation, reusing the result for an equation seen before
+    return loads(cached_solution(equation.strip(), variable.strip()))
+
+
+def serve():
+    """
+    Answer newline-delimited JSON requests from stdin until EOF.
+
+    Each input line is one request and each response is written as one line.
+    Keeping the process alive amortizes the SymPy import and reuses
+    memoized solutions across requests.
+    """
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+
+        if len(line) > MAX_INPUT_BYTES:
+            emit(INPUT_TOO_LARGE_ERROR)
+            sys.stdout.buffer.flush()
+            continue
+
+        try:
+            result = handle_request(loads(line))
+        except json.JSONDecodeError as e:
+            result = {
                 "success": False,
-                "error": "Variable must be a non-empty string"
-            }))
+                "error": f"Invalid JSON input: {str(e)}"
+            }
+        except Exception as e:
+            result = {
+                "success": False,
+                "error": f"Unexpected error: {str(e)}"
+            }
+
+        emit(result)
+        sys.stdout.buffer.flush()
+
+
+def main():
+    if '--server' in sys.argv[1:]:
+        serve()
+        return
+
+    try:
+        # Read input from stdin, stopping as soon as it is over the limit
+        data = sys.stdin.buffer.read(MAX_INPUT_BYTES + 1)
+        if len(data) > MAX_INPUT_BYTES:
+            emit(INPUT_TOO_LARGE_ERROR)
             sys.exit(1)
+        input_data = loads(data)
 
         # Solve the equation
-        result = solve_equation_symbolic(equation.strip(), variable.strip())
+        result = handle_request(input_data)
 
         # Return result
-        print(json.dumps(result))
+        emit(result)
 
         # Exit with error code if solving failed
         if not result.get("success", False):
             sys.exit(1)
 
     except json.JSONDecodeError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Invalid JSON input: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
     except Exception as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Unexpected error: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
 
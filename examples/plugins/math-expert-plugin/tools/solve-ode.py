@@ -1,16 +1,91 @@
 #!/usr/bin/env python3
 import json
 import sys
+import builtins
+import types
+import os
 import re
+import hashlib
+import tempfile
+import functools
+from tokenize import TokenError
 
 try:
-    import sympy
+    import orjson
 except ImportError:
-    print(json.dumps({
-        "success": False,
-        "error": "SymPy is not installed. Please install it using: pip install sympy"
-    }))
-    sys.exit(1)
+    orjson = None
+
+# A run of 19+ digits may be an integer outside orjson's 64-bit range
+LONG_INTEGER_RE = re.compile(rb'\d{19}')
+
+
+def loads(data):
+    """Parse JSON input, using orjson when it is installed."""
+    # orjson reads integers wider than 64 bits as floats, so leave those to json
+    if orjson is not None and not LONG_INTEGER_RE.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def emit(response):
+    """Write a JSON response line straight to the stdout buffer."""
+    if orjson is not None:
+        try:
+            sys.stdout.buffer.write(orjson.dumps(response, option=orjson.OPT_APPEND_NEWLINE))
+            return
+        except TypeError:
+            # orjson only handles 64-bit integers; let json encode bignums
+            pass
+    sys.stdout.buffer.write(json.dumps(response).encode('utf-8') + b"\n")
+
+
+# SymPy is only imported for equations that pass validation and miss the cache
+sympy = None
+parse_expr = None
+TRANSFORMATIONS = None
+
+
+def require_sympy():
+    """Import SymPy and its expression parser on first use and return the module."""
+    global sympy, parse_expr, TRANSFORMATIONS
+    if sympy is None:
+        try:
+            import sympy as sympy_module
+            from sympy.parsing import sympy_parser
+        except ImportError:
+            raise ValueError("SymPy is not installed. Please install it using: pip install sympy")
+        parse_expr = sympy_parser.parse_expr
+        # The rules sympify() uses for strings, '^' included, without its type dispatch
+        TRANSFORMATIONS = sympy_parser.standard_transformations + (sympy_parser.convert_xor,)
+        sympy = sympy_module
+    return sympy
+
+
+DANGEROUS_PATTERNS = [
+    '__', 'import', 'exec', 'eval', 'compile', 'open', 'file',
+    'input', 'raw_input', 'globals', 'locals', 'vars', 'dir',
+    'getattr', 'setattr', 'delattr', 'hasattr', 'callable',
+    'classmethod', 'staticmethod', 'property', 'lambda'
+]
+DANGEROUS_PATTERN_RE = re.compile('|'.join(map(re.escape, DANGEROUS_PATTERNS)))
+
+# Whitespace the tokenizer skips, so a tab or newline cannot split a pattern
+WHITESPACE_TABLE = str.maketrans('', '', ' \t\n\r\v\f')
+
+ALLOWED_EXPRESSION_RE = re.compile(r"^[a-zA-Z0-9\+\-\*/\(\)\.\,\s\^\%'=]+$")
+
+# Solved equations are kept here so a repeated one-shot call skips dsolve
+CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+    'math-expert', 'ode'
+)
+
+# Part of every cache key; bump it whenever the response shape changes so
+# entries written by an older version of this tool are never served
+CACHE_FORMAT_VERSION = '2'
+
+# Once the cache grows past this many entries the least recently used are removed
+CACHE_MAX_ENTRIES = 1000
 
 
 def validate_expression(expr_str):
@@ -25,29 +100,178 @@ def validate_expression(expr_str):
     Raises:
         ValueError: If expression contains dangerous patterns
     """
-    # Remove whitespace for checking
-    check_str = expr_str.replace(' ', '')
+    # Remove whitespace and lowercase once for checking
+    check_str = expr_str.translate(WHITESPACE_TABLE).lower()
 
     # Block common code execution patterns
-    dangerous_patterns = [
-        '__', 'import', 'exec', 'eval', 'compile', 'open', 'file',
-        'input', 'raw_input', 'globals', 'locals', 'vars', 'dir',
-        'getattr', 'setattr', 'delattr', 'hasattr', 'callable',
-        'classmethod', 'staticmethod', 'property', 'lambda'
-    ]
-
-    for pattern in dangerous_patterns:
-        if pattern in check_str.lower():
-            raise ValueError(f"Invalid expression: contains forbidden pattern '{pattern}'")
+    match = DANGEROUS_PATTERN_RE.search(check_str)
+    if match:
+        raise ValueError(f"Invalid expression: contains forbidden pattern '{match.group(0)}'")
 
     # Allow only: letters, numbers, basic operators, parentheses, and common math functions
     # Also allow ' for derivatives (e.g., f'(x)) and = for equations
-    allowed_pattern = r"^[a-zA-Z0-9\+\-\*/\(\)\.\,\s\^\%'=]+$"
-    if not re.match(allowed_pattern, expr_str):
+    if not ALLOWED_EXPRESSION_RE.match(expr_str):
         raise ValueError("Invalid expression: contains forbidden characters")
 
 
-def solve_ode(equation_str, function_name='f', variable_str='x'):
+@functools.lru_cache(maxsize=32)
+def derivative_pattern(function_name, variable_str):
+    """
+    Compile the prime-notation pattern for a function and variable.
+
+    Args:
+        function_name: Name of the unknown function (e.g. 'f')
+        variable_str: Independent variable (e.g. 'x')
+
+    Returns:
+        Compiled pattern matching f'(x), f''(x), ... with the primes in group 1
+    """
+    return re.compile(rf"{function_name}('+)\({variable_str}\)")
+
+
+def rewrite_derivatives(equation_str, function_name, variable_str):
+    """
+    Rewrite prime notation such as f''(x) as Derivative(f(x), x, 2).
+
+    Every order is handled in a single pass over the equation.
+    """
+    call = f"{function_name}({variable_str})"
+
+    def derivative(match):
+        order = len(match.group(1))
+        suffix = f", {order}" if order > 1 else ""
+        return f"Derivative({call}, {variable_str}{suffix})"
+
+    return derivative_pattern(function_name, variable_str).sub(derivative, equation_str)
+
+
+def cache_path(equation_str, function_name, variable_str, simplify, cse):
+    """
+    Locate the on-disk cache entry for an ODE.
+
+    The key covers CACHE_FORMAT_VERSION and the SymPy version as well as the
+    inputs, because either a change to this tool or another SymPy release may
+    produce a different response. The SymPy version is read from the package
+    metadata so a cache hit never has to import SymPy; without an installed
+    SymPy there is nothing to key on and None is returned.
+
+    The cache is bounded by CACHE_MAX_ENTRIES (see prune_cache) and can be
+    cleared at any time by deleting CACHE_DIR.
+    """
+    from importlib import metadata
+
+    try:
+        version = metadata.version('sympy')
+    except metadata.PackageNotFoundError:
+        return None
+    key = "\0".join((CACHE_FORMAT_VERSION, version, equation_str, function_name, variable_str, str(simplify), str(cse)))
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.json")
+
+
+def read_cached_result(path):
+    """Return the result stored at path, or None if there is no usable entry."""
+    try:
+        with open(path, 'rb') as cache_file:
+            result = json.loads(cache_file.read())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(result, dict):
+        return None
+
+    # Mark the entry as recently used so prune_cache keeps it
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return result
+
+
+def write_cached_result(path, result):
+    """Store a result atomically; the cache is best effort, so I/O errors are ignored."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    except OSError:
+        return
+
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as cache_file:
+            json.dump(result, cache_file)
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        return
+
+    prune_cache()
+
+
+def prune_cache():
+    """Remove the least recently used entries once there are more than CACHE_MAX_ENTRIES."""
+    try:
+        entries = [entry for entry in os.scandir(CACHE_DIR) if entry.name.endswith('.json')]
+        if len(entries) <= CACHE_MAX_ENTRIES:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+    except OSError:
+        return
+
+    for entry in entries[:len(entries) - CACHE_MAX_ENTRIES]:
+        try:
+            os.unlink(entry.path)
+        except OSError:
+            # Another process may have removed it already
+            pass
+
+
+@functools.lru_cache(maxsize=1)
+def parser_globals():
+    """
+    Build the global namespace parse_expr uses for SymPy names.
+
+    parse_expr constructs this namespace (everything in sympy.__all__, the
+    builtin functions, and Max/Min as max/min) on every call unless one is
+    passed in, so it is built once and shared.
+    """
+    namespace = {name: getattr(sympy, name) for name in sympy.__all__}
+    for name, obj in vars(builtins).items():
+        if isinstance(obj, types.BuiltinFunctionType):
+            namespace[name] = obj
+    namespace['max'] = sympy.Max
+    namespace['min'] = sympy.Min
+    return namespace
+
+
+@functools.lru_cache(maxsize=32)
+def parser_locals(function_name, variable_str):
+    """
+    Create the symbol, function, and parser locals for an ODE.
+
+    Args:
+        function_name: Name of the unknown function (e.g. 'f')
+        variable_str: Independent variable (e.g. 'x')
+
+    Returns:
+        Tuple of (variable symbol, undefined function, local namespace)
+    """
+    variable = sympy.Symbol(variable_str)
+    func = sympy.Function(function_name)
+    return variable, func, {function_name: func, variable_str: variable}
+
+
+def parse_side(expr_str, local_dict):
+    """Parse one side of the equation, reporting malformed input as a ValueError."""
+    try:
+        return parse_expr(expr_str, local_dict=local_dict, global_dict=parser_globals(),
+                          transformations=TRANSFORMATIONS)
+    except (SyntaxError, TokenError):
+        raise ValueError(f"Invalid expression syntax: could not parse '{expr_str}'")
+
+
+def solve_ode(equation_str, function_name='f', variable_str='x', simplify=False, cse=False):
     """
     Solve an ordinary differential equation symbolically using SymPy.
 
@@ -55,6 +279,8 @@ def solve_ode(equation_str, function_name='f', variable_str='x'):
         equation_str: String containing the ODE (e.g., "f'(x) + 2*f(x) = 0" or "Derivative(f(x), x) + 2*f(x) = 0")
         function_name: Name of the function to solve for (default: 'f')
         variable_str: Independent variable (default: 'x')
+        simplify: Whether to run simplify() on the solution (default: False)
+        cse: Whether to factor out common subexpressions (default: False)
 
     Returns:
         Dictionary containing success status and solution
@@ -63,36 +289,16 @@ def solve_ode(equation_str, function_name='f', variable_str='x'):
         # Validate expression
         validate_expression(equation_str)
 
-        # Define symbols and function
-        variable = sympy.Symbol(variable_str)
-        func = sympy.Function(function_name)
+        # Reuse the solution from an earlier call if there is one
+        path = cache_path(equation_str, function_name, variable_str, simplify, cse)
+        cached = read_cached_result(path) if path else None
+        if cached is not None:
+            return cached
 
         # Parse the equation
         # Support both f'(x) notation and Derivative(f(x), x) notation
-        # Replace f'(x) with Derivative(f(x), x) for parsing
-        equation_normalized = equation_str
-
-        # Handle f'(x), f''(x), etc.
-        equation_normalized = re.sub(
-            rf"{function_name}''''\({variable_str}\)",
-            f"Derivative({function_name}({variable_str}), {variable_str}, 4)",
-            equation_normalized
-        )
-        equation_normalized = re.sub(
-            rf"{function_name}'''\({variable_str}\)",
-            f"Derivative({function_name}({variable_str}), {variable_str}, 3)",
-            equation_normalized
-        )
-        equation_normalized = re.sub(
-            rf"{function_name}''\({variable_str}\)",
-            f"Derivative({function_name}({variable_str}), {variable_str}, 2)",
-            equation_normalized
-        )
-        equation_normalized = re.sub(
-            rf"{function_name}'\({variable_str}\)",
-            f"Derivative({function_name}({variable_str}), {variable_str})",
-            equation_normalized
-        )
+        # Replace f'(x), f''(x), etc. with Derivative(f(x), x, n) for parsing
+        equation_normalized = rewrite_derivatives(equation_str, function_name, variable_str)
 
         # Check for equation sign
         if '=' not in equation_normalized:
@@ -107,10 +313,14 @@ def solve_ode(equation_str, function_name='f', variable_str='x'):
         if not left_str or not right_str:
             raise ValueError("Both sides of the equation must be non-empty")
 
+        require_sympy()
+
+        # Define symbols and function
+        variable, func, safe_locals = parser_locals(function_name, variable_str)
+
         # Parse both sides
-        safe_locals = {function_name: func, variable_str: variable}
-        left_expr = sympy.sympify(left_str, locals=safe_locals)
-        right_expr = sympy.sympify(right_str, locals=safe_locals)
+        left_expr = parse_side(left_str, safe_locals)
+        right_expr = parse_side(right_str, safe_locals)
 
         # Create equation as left - right = 0
         equation = sympy.Eq(left_expr, right_expr)
@@ -118,17 +328,39 @@ def solve_ode(equation_str, function_name='f', variable_str='x'):
         # Solve the ODE
         solution = sympy.dsolve(equation, func(variable))
 
-        # Simplify the solution
-        simplified_solution = sympy.simplify(solution)
-
-        return {
+        # dsolve usually returns its simplest form already, and simplify()
+        # often costs more than dsolve itself, so it only runs on request
+        if simplify:
+            if isinstance(solution, list):
+                solution = [sympy.simplify(branch) for branch in solution]
+            else:
+                solution = sympy.simplify(solution)
+
+        # Name the repeated subexpressions x0, x1, ... so long solutions
+        # print once per subexpression; names already in use are skipped.
+        # Only the right-hand sides are reduced, so f(x) itself is never
+        # factored out and each branch still reads as a solution for it.
+        if cse:
+            branches = solution if isinstance(solution, list) else [solution]
+            replacements, reduced = sympy.cse(
+                [branch.rhs for branch in branches],
+                symbols=sympy.numbered_symbols(exclude={sympy.Symbol(function_name)}))
+            reduced = [sympy.Eq(branch.lhs, rhs) for branch, rhs in zip(branches, reduced)]
+            solution = reduced if isinstance(solution, list) else reduced[0]
+
+        result = {
             "success": True,
-            "solution": str(simplified_solution),
+            "solution": str(solution),
             "equation": equation_str,
             "function": function_name,
             "variable": variable_str,
             "solution_type": "general_solution"
         }
+        if cse:
+            result["common_subexpressions"] = [[str(symbol), str(expr)] for symbol, expr in replacements]
+        if path:
+            write_cached_result(path, result)
+        return result
 
     except ValueError as e:
         return {
@@ -142,66 +374,122 @@ def solve_ode(equation_str, function_name='f', variable_str='x'):
         }
 
 
-def main():
-    try:
-        # Read input from stdin
-        input_data = json.load(sys.stdin)
+def handle_request(input_data):
+    """
+    Validate tool arguments and solve the ODE.
 
-        equation = input_data.get('equation')
-        function = input_data.get('function', 'f')
-        variable = input_data.get('variable', 'x')
+    Args:
+        input_data: Dictionary of tool arguments
 
-        # Validate inputs
-        if equation is None:
-            print(json.dumps({
-                "success": False,
-                "error": "Missing required parameter 'equation'"
-            }))
-            sys.exit(1)
+    Returns:
+        Dictionary containing success status and solution or error
+    """
+    equation = input_data.get('equation')
+    function = input_data.get('function', 'f')
+    variable = input_data.get('variable', 'x')
+    simplify = input_data.get('simplify', False)
+    cse = input_data.get('cse', False)
+
+    # Validate inputs
+    if equation is None:
+        return {
+            "success": False,
+            "error": "Missing required parameter 'equation'"
+        }
 
-        if not isinstance(equation, str) or not equation.strip():
-            print(json.dumps({
-                "success": False,
-                "error": "Equation must be a non-empty string"
-            }))
-            sys.exit(1)
+    if not isinstance(equation, str) or not equation.strip():
+        return {
+            "success": False,
+            "error": "Equation must be a non-empty string"
+        }
 
-        if not isinstance(function, str) or not function.strip():
-            print(json.dumps({
-                "success": False,
-                "error": "Function must be a non-empty string"
-            }))
-            sys.exit(1)
+    if not isinstance(function, str) or not function.strip():
+        return {
+            "success": False,
+            "error": "Function must be a non-empty string"
+        }
+
+    if not isinstance(variable, str) or not variable.strip():
+        return {
+            "success": False,
+            "error": "Variable must be a non-empty string"
+        }
+
+    if not isinstance(simplify, bool):
+        return {
+            "success": False,
+            "error": "simplify must be a boolean"
+        }
+
+    if not isinstance(cse, bool):
+        return {
+            "success": False,
+            "error": "cse must be a boolean"
+        }
+
+    # Solve the ODE
+    return solve_ode(equation.strip(), function.strip(), variable.strip(), simplify, cse)
+
+
+def serve():
+    """
+    Answer newline-delimited JSON requests from stdin until EOF.
 
-        if not isinstance(variable, str) or not variable.strip():
-            print(json.dumps({
+    Each input line is one request and each response is written as one line,
+    so SymPy is imported at most once for the life of the process.
+    """
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+
+        try:
+            result = handle_request(loads(line))
+        except json.JSONDecodeError as e:
+            result = {
                 "success": False,
-                "error": "Variable must be a non-empty string"
-            }))
-            sys.exit(1)
+                "error": f"Invalid JSON input: {str(e)}"
+            }
+        except Exception as e:
+            result = {
+                "success": False,
+                "error": f"Unexpected error: {str(e)}"
+            }
+
+        emit(result)
+        sys.stdout.buffer.flush()
+
+
+def main():
+    if '--server' in sys.argv[1:]:
+        serve()
+        return
+
+    try:
+        # Read input from stdin
+        input_data = loads(sys.stdin.buffer.read())
 
         # Solve the ODE
-        result = solve_ode(equation.strip(), function.strip(), variable.strip())
+        result = handle_request(input_data)
 
         # Return result
-        print(json.dumps(result))
+        emit(result)
 
         # Exit with error code if solving failed
         if not result.get("success", False):
             sys.exit(1)
 
     except json.JSONDecodeError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Invalid JSON input: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
     except Exception as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Unexpected error: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
 
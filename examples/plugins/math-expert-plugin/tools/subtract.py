@@ -1,44 +1,138 @@
 #!/usr/bin/env python3
 import json
 import sys
+import re
+import math
 
-def main():
-    try:
-        # Read input from stdin
-        input_data = json.load(sys.stdin)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# A run of 19+ digits may be an integer outside orjson's 64-bit range
+LONG_INTEGER_RE = re.compile(rb'\d{19}')
+
+
+def loads(data):
+    """Parse JSON input, using orjson when it is installed."""
+    # orjson reads integers wider than 64 bits as floats, so leave those to json
+    if orjson is not None and not LONG_INTEGER_RE.search(data):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def emit(response):
+    """Write a JSON response line straight to the stdout buffer."""
+    if orjson is not None:
+        try:
+            sys.stdout.buffer.write(orjson.dumps(response, option=orjson.OPT_APPEND_NEWLINE))
+            return
+        except TypeError:
+            # orjson only handles 64-bit integers; let json encode bignums
+            pass
+    sys.stdout.buffer.write(json.dumps(response).encode('utf-8') + b"\n")
+
+
+# Success response for plain int/float operands, filled in without a dict or encoder
+RESULT_TEMPLATE = b'{"success":true,"result":%b,"operation":"%b - %b = %b"}\n'
+PLAIN_NUMBER_TYPES = (int, float)
+
+
+def emit_result(a, b, result):
+    """Write the success response, templating the bytes directly for plain numbers."""
+    # bool is an int subclass and inf/nan are not valid JSON, so both take the slow path
+    if (type(a) in PLAIN_NUMBER_TYPES and type(b) in PLAIN_NUMBER_TYPES
+            and (type(result) is int or math.isfinite(result))):
+        result_bytes = repr(result).encode()
+        sys.stdout.buffer.write(RESULT_TEMPLATE % (result_bytes, repr(a).encode(), repr(b).encode(), result_bytes))
+        return
+    emit({
+        "success": True,
+        "result": result,
+        "operation": f"{a} - {b} = {result}"
+    })
+
+
+def handle_request(input_data):
+    """
+    Subtract b from a and write the response.
+
+    Args:
+        input_data: Dictionary of tool arguments
+
+    Returns:
+        True if the subtraction succeeded, False if arguments were missing
+    """
+    a = input_data.get('a')
+    b = input_data.get('b')
+
+    if a is None or b is None:
+        emit({
+            "success": False,
+            "error": "Missing required parameters 'a' and 'b'"
+        })
+        return False
+
+    # Perform subtraction
+    result = a - b
+
+    # Return result
+    emit_result(a, b, result)
+    return True
 
-        a = input_data.get('a')
-        b = input_data.get('b')
 
-        if a is None or b is None:
-            print(json.dumps({
+def serve():
+    """
+    Answer newline-delimited JSON requests from stdin until EOF.
+
+    Each input line is one request and each response is written as one line,
+    which saves interpreter startup on every call after the first.
+    """
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+
+        try:
+            handle_request(loads(line))
+        except json.JSONDecodeError as e:
+            emit({
                 "success": False,
-                "error": "Missing required parameters 'a' and 'b'"
-            }))
-            sys.exit(1)
+                "error": f"Invalid JSON input: {str(e)}"
+            })
+        except Exception as e:
+            emit({
+                "success": False,
+                "error": f"Unexpected error: {str(e)}"
+            })
 
-        # Perform subtraction
-        result = a - b
+        sys.stdout.buffer.flush()
 
-        # Return result
-        print(json.dumps({
-            "success": True,
-            "result": result,
-            "operation": f"{a} - {b} = {result}"
-        }))
+
+def main():
+    if '--server' in sys.argv[1:]:
+        serve()
+        return
+
+    try:
+        # Read input from stdin
+        input_data = loads(sys.stdin.buffer.read())
+
+        if not handle_request(input_data):
+            sys.exit(1)
 
     except json.JSONDecodeError as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Invalid JSON input: {str(e)}"
-        }))
+        })
         sys.exit(1)
     except Exception as e:
-        print(json.dumps({
+        emit({
             "success": False,
             "error": f"Unexpected error: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
+
 if __name__ == "__main__":
     main()